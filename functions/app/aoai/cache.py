@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Protocol
+
+_STATS_LOCK = threading.Lock()
+_STATS: dict[str, int] = {"hits": 0, "misses": 0, "errors": 0}
+
+
+class ResponseCache(Protocol):
+    def get(self, key: str) -> str | None: ...
+
+    def set(self, key: str, value: str) -> None: ...
+
+
+class SqliteResponseCache:
+    """On-disk cache with TTL expiry and a cap on the number of entries."""
+
+    def __init__(self, path: str, ttl_seconds: int, max_entries: int) -> None:
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_created_at ON responses (created_at)")
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM responses WHERE key = ? AND created_at >= ?",
+                (key, time.time() - self._ttl_seconds),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at) VALUES (?, ?, ?)",
+                (key, value, now),
+            )
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self._ttl_seconds,))
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self._max_entries,),
+            )
+
+
+class CosmosResponseCache:
+    """Cache shared across instances; expiry relies on the container's per-item ``ttl``."""
+
+    def __init__(self, container_name: str, ttl_seconds: int) -> None:
+        self._container_name = container_name
+        self._ttl_seconds = ttl_seconds
+
+    def get(self, key: str) -> str | None:
+        from app.cosmos.repository import safe_read_item
+
+        item = safe_read_item(self._container_name, key, key)
+        if not item or item.get("createdAt", 0) < time.time() - self._ttl_seconds:
+            return None
+        return item.get("value")
+
+    def set(self, key: str, value: str) -> None:
+        from app.cosmos.repository import upsert_item
+
+        item = {"id": key, "value": value, "createdAt": time.time(), "ttl": self._ttl_seconds}
+        upsert_item(self._container_name, item, partition_key=key)
+
+
+def _get_settings() -> tuple[str, str, int, int]:
+    backend = os.environ.get("AZURE_OPENAI_CACHE_BACKEND", "sqlite").strip().lower()
+    if backend == "cosmos":
+        location = os.environ.get("AZURE_OPENAI_CACHE_CONTAINER", "llm_cache")
+    else:
+        location = os.environ.get(
+            "AZURE_OPENAI_CACHE_PATH",
+            os.path.join(tempfile.gettempdir(), "aoai_response_cache.sqlite3"),
+        )
+    ttl_seconds = int(os.environ.get("AZURE_OPENAI_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+    max_entries = int(os.environ.get("AZURE_OPENAI_CACHE_MAX_ENTRIES", "10000"))
+    return backend, location, ttl_seconds, max_entries
+
+
+@lru_cache(maxsize=1)
+def _build_cache(backend: str, location: str, ttl_seconds: int, max_entries: int) -> ResponseCache | None:
+    if backend == "sqlite":
+        return SqliteResponseCache(location, ttl_seconds, max_entries)
+    if backend == "cosmos":
+        return CosmosResponseCache(location, ttl_seconds)
+    return None
+
+
+def get_response_cache() -> ResponseCache | None:
+    return _build_cache(*_get_settings())
+
+
+def cache_key(deployment: str, system_prompt: str, message: str, response_format: dict[str, Any] | None = None) -> str:
+    raw = json.dumps([deployment, system_prompt, message, response_format], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _count(name: str) -> None:
+    with _STATS_LOCK:
+        _STATS[name] += 1
+
+
+def lookup(key: str) -> str | None:
+    cache = get_response_cache()
+    if cache is None:
+        return None
+    try:
+        value = cache.get(key)
+    except Exception:
+        logging.warning("AOAI response cache read failed", exc_info=True)
+        _count("errors")
+        return None
+    _count("hits" if value is not None else "misses")
+    return value
+
+
+def store(key: str, value: str) -> None:
+    cache = get_response_cache()
+    if cache is None or not value:
+        return
+    try:
+        cache.set(key, value)
+    except Exception:
+        logging.warning("AOAI response cache write failed", exc_info=True)
+        _count("errors")
+
+
+def get_cache_stats() -> dict[str, int]:
+    with _STATS_LOCK:
+        return dict(_STATS)
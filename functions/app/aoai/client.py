@@ -1,8 +1,15 @@
 from __future__ import annotations
 
+import importlib.util
 import os
+from functools import lru_cache
+from typing import TYPE_CHECKING
 
-from openai import AzureOpenAI  # type: ignore
+# openai and httpx take a few hundred ms to import; they are loaded when the
+# first client is built so HTTP routes that never call AOAI do not pay for it.
+if TYPE_CHECKING:
+    import httpx  # type: ignore
+    from openai import AsyncAzureOpenAI, AzureOpenAI  # type: ignore
 
 
 def _require_env(key: str) -> str:
@@ -12,12 +19,67 @@ def _require_env(key: str) -> str:
     return value
 
 
-def get_client() -> AzureOpenAI:
+def _get_settings() -> tuple[str, str, str]:
     endpoint = _require_env("AZURE_OPENAI_ENDPOINT").rstrip("/")
     api_key = _require_env("AZURE_OPENAI_API_KEY")
     api_version = os.environ.get("AZURE_OPENAI_API_VERSION", "2024-06-01")
+    return endpoint, api_key, api_version
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+def _get_limits() -> httpx.Limits:
+    import httpx  # type: ignore
+
+    max_connections = int(os.environ.get("AZURE_OPENAI_MAX_CONNECTIONS", "20"))
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=int(os.environ.get("AZURE_OPENAI_MAX_KEEPALIVE", str(max_connections))),
+        keepalive_expiry=float(os.environ.get("AZURE_OPENAI_KEEPALIVE_EXPIRY", "60")),
+    )
+
+
+# Retries are left to app.aoai.limiter, which honours retry-after and backs
+# off concurrency; SDK retries would bypass both.
+# The caches are keyed by the connection settings, so a client (and its
+# connection pool) is reused across calls and only rebuilt when the endpoint,
+# key or api-version env vars change.
+@lru_cache(maxsize=1)
+def _build_client(endpoint: str, api_key: str, api_version: str) -> AzureOpenAI:
+    from openai import AzureOpenAI, DefaultHttpxClient  # type: ignore
+
     return AzureOpenAI(
         azure_endpoint=endpoint,
         api_key=api_key,
         api_version=api_version,
+        max_retries=0,
+        http_client=DefaultHttpxClient(limits=_get_limits(), http2=_http2_available()),
     )
+
+
+@lru_cache(maxsize=1)
+def _build_async_client(endpoint: str, api_key: str, api_version: str) -> AsyncAzureOpenAI:
+    from openai import AsyncAzureOpenAI, DefaultAsyncHttpxClient  # type: ignore
+
+    return AsyncAzureOpenAI(
+        azure_endpoint=endpoint,
+        api_key=api_key,
+        api_version=api_version,
+        max_retries=0,
+        http_client=DefaultAsyncHttpxClient(limits=_get_limits(), http2=_http2_available()),
+    )
+
+
+def get_client() -> AzureOpenAI:
+    return _build_client(*_get_settings())
+
+
+def get_async_client() -> AsyncAzureOpenAI:
+    """Return the process-wide async client.
+
+    The underlying connection pool is bound to the event loop that first uses
+    it, so this is meant for the Functions worker's single long-lived loop.
+    """
+    return _build_async_client(*_get_settings())
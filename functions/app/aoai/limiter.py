@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+# Summaries (and combined requests, which carry the summary) go first; CEFR
+# rewrites only spend the part of the token budget above the reserve.
+PRIORITY_HIGH = 0
+PRIORITY_LOW = 1
+
+
+@lru_cache(maxsize=1)
+def _retryable() -> tuple[type[Exception], ...]:
+    # Imported on first call rather than at module load; see app.aoai.client.
+    from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError  # type: ignore
+
+    return (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+
+
+class TokenBucket:
+    """Refills at ``per_minute / 60`` per second up to ``capacity``.
+
+    Not thread-safe on its own; the limiter holds its lock around every call.
+    """
+
+    def __init__(self, per_minute: float, capacity: float) -> None:
+        self.rate = per_minute / 60.0
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_for(self, amount: float, reserve: float = 0.0) -> float:
+        """Seconds until ``amount`` can be taken while leaving ``reserve`` behind."""
+        needed = min(amount + reserve, self.capacity) - self.tokens
+        return max(0.0, needed / self.rate) if self.rate > 0 else 0.0
+
+    def take(self, amount: float) -> None:
+        self.tokens -= amount
+
+
+class AdaptiveLimiter:
+    """Client-side scheduler for Azure OpenAI calls.
+
+    Requests and estimated tokens are drawn from token buckets sized to the
+    deployment's RPM/TPM quota (a 10-second burst, which is how Azure
+    evaluates them). Concurrency follows AIMD: it grows by one slot per
+    ``limit`` successful calls and halves on a 429, down to one. A
+    ``retry-after`` from the service pauses every caller until it passes.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_concurrency: int = 8,
+        priority_reserve: float = 0.2,
+        max_retries: int = 6,
+    ) -> None:
+        self._requests = TokenBucket(requests_per_minute, requests_per_minute / 6) if requests_per_minute > 0 else None
+        self._tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 6) if tokens_per_minute > 0 else None
+        self._max_concurrency = max(1, max_concurrency)
+        self._limit = float(self._max_concurrency)
+        self._priority_reserve = priority_reserve
+        self._max_retries = max_retries
+        self._in_flight = 0
+        self._waiting_high = 0
+        self._blocked_until = 0.0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+        self._stats = {"calls": 0, "throttled": 0, "retries": 0, "failures": 0, "waitSeconds": 0.0}
+
+    def _wait_time(self, estimated_tokens: int, priority: int, now: float) -> float:
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        if priority != PRIORITY_HIGH and self._waiting_high:
+            return 0.05
+        if self._in_flight >= int(self._limit):
+            return 0.05
+        wait = 0.0
+        if self._requests:
+            self._requests.refill(now)
+            wait = max(wait, self._requests.wait_for(1))
+        if self._tokens:
+            self._tokens.refill(now)
+            reserve = self._tokens.capacity * self._priority_reserve if priority != PRIORITY_HIGH else 0.0
+            wait = max(wait, self._tokens.wait_for(estimated_tokens, reserve))
+        return wait
+
+    def _try_acquire(self, estimated_tokens: int, priority: int) -> float:
+        """Take a slot and return 0, or return how long to wait before retrying."""
+        wait = self._wait_time(estimated_tokens, priority, time.monotonic())
+        if wait > 0:
+            return wait
+        if self._requests:
+            self._requests.take(1)
+        if self._tokens:
+            self._tokens.take(min(estimated_tokens, self._tokens.capacity))
+        self._in_flight += 1
+        return 0.0
+
+    def acquire(self, estimated_tokens: int, priority: int = PRIORITY_HIGH) -> None:
+        started = time.monotonic()
+        with self._cond:
+            if priority == PRIORITY_HIGH:
+                self._waiting_high += 1
+            try:
+                while (wait := self._try_acquire(estimated_tokens, priority)) > 0:
+                    self._cond.wait(wait)
+            finally:
+                if priority == PRIORITY_HIGH:
+                    self._waiting_high -= 1
+            self._stats["waitSeconds"] += time.monotonic() - started
+
+    async def acquire_async(self, estimated_tokens: int, priority: int = PRIORITY_HIGH) -> None:
+        started = time.monotonic()
+        with self._cond:
+            if priority == PRIORITY_HIGH:
+                self._waiting_high += 1
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_acquire(estimated_tokens, priority)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(min(wait, 1.0))
+        finally:
+            with self._cond:
+                if priority == PRIORITY_HIGH:
+                    self._waiting_high -= 1
+                self._stats["waitSeconds"] += time.monotonic() - started
+
+    def release(self, estimated_tokens: int, used_tokens: int | None = None, retry_after: float | None = None) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._stats["calls"] += 1
+            now = time.monotonic()
+            if retry_after is not None:
+                self._stats["throttled"] += 1
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+                # One burst of 429s from calls already in flight counts as a single signal.
+                if now - self._last_decrease > 1.0:
+                    self._limit = max(1.0, self._limit / 2)
+                    self._last_decrease = now
+            else:
+                self._limit = min(float(self._max_concurrency), self._limit + 1 / self._limit)
+                if self._tokens and used_tokens is not None:
+                    # Settle the estimate against the usage the service reported.
+                    self._tokens.take(used_tokens - min(estimated_tokens, self._tokens.capacity))
+            self._cond.notify_all()
+
+    def _backoff(self, error: Exception, attempt: int) -> float:
+        retry_after = _retry_after_seconds(error)
+        if retry_after is not None:
+            return retry_after
+        return min(60.0, 2**attempt) * random.uniform(0.5, 1.0)
+
+    def call(
+        self,
+        fn: Callable[[], T],
+        estimated_tokens: int,
+        priority: int = PRIORITY_HIGH,
+        usage: Callable[[T], int | None] | None = None,
+        max_retries: int | None = None,
+    ) -> T:
+        """Run ``fn`` under the limits, retrying throttling and transient errors.
+
+        ``max_retries`` overrides the limiter-wide retry budget for this call.
+        """
+        retries = self._max_retries if max_retries is None else max_retries
+        for attempt in range(retries + 1):
+            self.acquire(estimated_tokens, priority)
+            try:
+                result = fn()
+            except _retryable() as exc:
+                time.sleep(self._on_error(exc, estimated_tokens, attempt, retries))
+                continue
+            except Exception:
+                self.release(estimated_tokens)
+                raise
+            self.release(estimated_tokens, usage(result) if usage else None)
+            return result
+        raise RuntimeError("unreachable")
+
+    async def call_async(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        estimated_tokens: int,
+        priority: int = PRIORITY_HIGH,
+        usage: Callable[[T], int | None] | None = None,
+        max_retries: int | None = None,
+    ) -> T:
+        retries = self._max_retries if max_retries is None else max_retries
+        for attempt in range(retries + 1):
+            await self.acquire_async(estimated_tokens, priority)
+            try:
+                result = await fn()
+            except _retryable() as exc:
+                await asyncio.sleep(self._on_error(exc, estimated_tokens, attempt, retries))
+                continue
+            except Exception:
+                self.release(estimated_tokens)
+                raise
+            self.release(estimated_tokens, usage(result) if usage else None)
+            return result
+        raise RuntimeError("unreachable")
+
+    def _on_error(self, exc: Exception, estimated_tokens: int, attempt: int, max_retries: int) -> float:
+        """Record a retryable failure and return how long the caller should wait before retrying.
+
+        Throttling pauses every caller through ``release`` (acquire waits it
+        out), so only other transient errors back off here.
+        """
+        delay = self._backoff(exc, attempt)
+        throttled = isinstance(exc, _retryable()[0])
+        self.release(estimated_tokens, retry_after=delay if throttled else None)
+        if attempt >= max_retries:
+            with self._cond:
+                self._stats["failures"] += 1
+            raise exc
+        with self._cond:
+            self._stats["retries"] += 1
+        logging.warning("AOAI call failed (%s); retry %s in %.1fs", type(exc).__name__, attempt + 1, delay)
+        return 0.0 if throttled else delay
+
+    def stats(self) -> dict[str, Any]:
+        with self._cond:
+            return {**self._stats, "concurrency": round(self._limit, 2), "inFlight": self._in_flight}
+
+
+def _retry_after_seconds(error: Exception) -> float | None:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    for name, scale in (("retry-after-ms", 0.001), ("x-ms-retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value:
+            try:
+                return max(0.0, float(value) * scale)
+            except ValueError:
+                continue
+    return None
+
+
+def estimate_tokens(*texts: str, completion_ratio: float = 1.0) -> int:
+    """Rough prompt + completion estimate (about four characters per token)."""
+    prompt = sum(len(text) for text in texts) // 4 + 16
+    return int(prompt * (1 + completion_ratio))
+
+
+@lru_cache(maxsize=1)
+def get_limiter() -> AdaptiveLimiter:
+    return AdaptiveLimiter(
+        requests_per_minute=float(os.environ.get("AZURE_OPENAI_RPM", "0")),
+        tokens_per_minute=float(os.environ.get("AZURE_OPENAI_TPM", "0")),
+        max_concurrency=int(os.environ.get("AZURE_OPENAI_MAX_CONCURRENCY", "8")),
+        priority_reserve=float(os.environ.get("AZURE_OPENAI_PRIORITY_RESERVE", "0.2")),
+        max_retries=int(os.environ.get("AZURE_OPENAI_MAX_RETRIES", "6")),
+    )
+
+
+def get_limiter_stats() -> dict[str, Any]:
+    return get_limiter().stats()
@@ -26,3 +26,21 @@ def cefr_prompt(level: str, content: str) -> tuple[str, str]:
         f"{content}"
     )
     return system, user
+
+
+def combined_prompt(content: str, levels: tuple[str, ...]) -> tuple[str, str]:
+    keys = ", ".join(f'"{level}"' for level in levels)
+    system = (
+        "You are a helpful assistant. Respond with a single JSON object only. "
+        "Every value must be plain text without markdown, bullet symbols, or prefixed phrases."
+    )
+    user = (
+        'Return a JSON object with the keys "summary", '
+        f"{keys}. "
+        '"summary" summarizes the news content in 3-5 concise sentences. '
+        "Each CEFR level key holds the content rewritten for learners at that level, "
+        "keeping facts accurate, using level-appropriate vocabulary and grammar, "
+        "and staying concise.\n\n"
+        f"{content}"
+    )
+    return system, user
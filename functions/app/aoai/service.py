@@ -1,21 +1,319 @@
 from __future__ import annotations
 
-from openai import AzureOpenAI  # type: ignore
+import asyncio
+import json
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Iterable
 
-from app.aoai.client import get_client
+from app.aoai import cache
+from app.aoai.client import get_async_client, get_client
+from app.aoai.limiter import PRIORITY_HIGH, PRIORITY_LOW, estimate_tokens, get_limiter
+from app.aoai.prompts import cefr_prompt, combined_prompt, summary_prompt
+from app.telemetry.metrics import timed
+
+if TYPE_CHECKING:
+    from openai import AsyncAzureOpenAI, AzureOpenAI  # type: ignore
+
+CEFR_LEVELS = ("A1", "A2", "B1", "B2", "C1", "C2")
+
+
+def _total_tokens(response: Any) -> int | None:
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", None)
 
 
 def chat_once(
     deployment: str,
     message: str,
     system_prompt: str = "You are a helpful assistant.",
+    response_format: dict[str, Any] | None = None,
+    priority: int = PRIORITY_HIGH,
+    estimated_tokens: int | None = None,
+    operation: str = "chat",
+    validate: Callable[[str], Any] | None = None,
 ) -> str:
+    """Send one chat completion, answered from the response cache when possible.
+
+    ``validate`` is run on the content before it is cached and raises if the
+    content is unusable. Cached content that fails it is ignored.
+    """
+    key = cache.cache_key(deployment, system_prompt, message, response_format)
+    cached = cache.lookup(key)
+    if cached is not None:
+        try:
+            if validate:
+                validate(cached)
+            return cached
+        except Exception:
+            logging.warning("Ignoring cached AOAI response that fails validation (%s)", operation)
+
     client: AzureOpenAI = get_client()
-    response = client.chat.completions.create(
-        model=deployment,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": message},
-        ],
+    extra: dict[str, Any] = {"response_format": response_format} if response_format else {}
+
+    def _create() -> Any:
+        with timed("aoai", operation) as sample:
+            response = client.chat.completions.create(
+                model=deployment,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": message},
+                ],
+                **extra,
+            )
+            sample.add_usage(response.usage)
+        return response
+
+    response = get_limiter().call(
+        _create,
+        estimated_tokens or estimate_tokens(system_prompt, message),
+        priority,
+        usage=_total_tokens,
+    )
+    content = response.choices[0].message.content or ""
+    if validate:
+        validate(content)
+    cache.store(key, content)
+    return content
+
+
+async def chat_once_async(
+    deployment: str,
+    message: str,
+    system_prompt: str = "You are a helpful assistant.",
+    priority: int = PRIORITY_HIGH,
+    operation: str = "chat",
+    max_retries: int | None = None,
+) -> str:
+    key = cache.cache_key(deployment, system_prompt, message)
+    # The cache backends (SQLite, sync Cosmos) block, so keep them off the event loop.
+    cached = await asyncio.to_thread(cache.lookup, key)
+    if cached is not None:
+        return cached
+
+    client: AsyncAzureOpenAI = get_async_client()
+
+    async def _create() -> Any:
+        with timed("aoai", operation) as sample:
+            response = await client.chat.completions.create(
+                model=deployment,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": message},
+                ],
+            )
+            sample.add_usage(response.usage)
+        return response
+
+    response = await get_limiter().call_async(
+        _create,
+        estimate_tokens(system_prompt, message),
+        priority,
+        usage=_total_tokens,
+        max_retries=max_retries,
+    )
+    content = response.choices[0].message.content or ""
+    await asyncio.to_thread(cache.store, key, content)
+    return content
+
+
+def clean_plain_text(text: str) -> str:
+    cleaned = (text or "").strip()
+    cleaned = re.sub(r"^Here is your rewritten text.*?:\s*", "", cleaned, flags=re.IGNORECASE)
+    cleaned = re.sub(r"^Here is.*?:\s*", "", cleaned, flags=re.IGNORECASE)
+    cleaned = cleaned.replace("**", "").replace("`", "")
+    cleaned = cleaned.replace("\n", " ").replace("\r", " ")
+    cleaned = re.sub(r"\s+", " ", cleaned).strip()
+    return cleaned
+
+
+def _get_max_concurrency() -> int:
+    try:
+        value = int(os.environ.get("AZURE_OPENAI_MAX_CONCURRENCY", "8"))
+    except ValueError:
+        value = 8
+    return max(1, value)
+
+
+def _get_interactive_max_retries() -> int:
+    # Runbook 6.1: a reader's request regenerates at most once; the nightly job keeps the limiter default.
+    try:
+        value = int(os.environ.get("AZURE_OPENAI_INTERACTIVE_MAX_RETRIES", "1"))
+    except ValueError:
+        value = 1
+    return max(0, value)
+
+
+def _get_generation_mode() -> str:
+    mode = os.environ.get("AZURE_OPENAI_GENERATION_MODE", "per_level").strip().lower()
+    return mode if mode in ("per_level", "combined") else "per_level"
+
+
+def _generate(
+    deployment: str,
+    prompt: Callable[[], tuple[str, str]],
+    priority: int = PRIORITY_HIGH,
+    operation: str = "chat",
+) -> str:
+    system_prompt, user_prompt = prompt()
+    text = chat_once(
+        deployment=deployment,
+        message=user_prompt,
+        system_prompt=system_prompt,
+        priority=priority,
+        operation=operation,
+    )
+    return clean_plain_text(text)
+
+
+def _parse_combined(raw: str) -> dict[str, Any]:
+    payload = json.loads(raw)
+    if not isinstance(payload, dict):
+        raise ValueError("Combined generation did not return a JSON object")
+    return payload
+
+
+def _generate_combined(
+    deployment: str,
+    source: str,
+    levels: tuple[str, ...] = CEFR_LEVELS,
+) -> tuple[str | None, dict[str, str]]:
+    """Ask for the summary and every requested level in one JSON response.
+
+    Returns only the parts that validate; anything missing or empty is left
+    for the per-level path to fill in.
+    """
+    system_prompt, user_prompt = combined_prompt(source, levels)
+    raw = chat_once(
+        deployment=deployment,
+        message=user_prompt,
+        system_prompt=system_prompt,
+        response_format={"type": "json_object"},
+        estimated_tokens=estimate_tokens(system_prompt, user_prompt, completion_ratio=len(levels) + 1),
+        operation="combined",
+        validate=_parse_combined,
+    )
+    payload = _parse_combined(raw)
+
+    def _text(key: str) -> str:
+        value = payload.get(key)
+        return clean_plain_text(value) if isinstance(value, str) else ""
+
+    summary = _text("summary") or None
+    texts = {level: text for level in levels if (text := _text(level))}
+    invalid = [level for level in levels if level not in texts]
+    if summary is None:
+        invalid.insert(0, "summary")
+    if invalid:
+        logging.warning("AOAI combined generation missing %s; falling back per level", ", ".join(invalid))
+    return summary, texts
+
+
+def generate_texts(
+    deployment: str,
+    sources: dict[str, str],
+    max_concurrency: int | None = None,
+    mode: str | None = None,
+    levels: dict[str, Iterable[str]] | None = None,
+) -> dict[str, tuple[str, dict[str, str]]]:
+    """Generate the summary and CEFR rewrites for many articles concurrently.
+
+    ``sources`` maps an article key to its source text. Every summary and
+    level rewrite is an independent task on one shared pool, so work runs in
+    parallel both within and across articles, bounded by ``max_concurrency``
+    (``AZURE_OPENAI_MAX_CONCURRENCY`` by default). Calls go through the shared
+    rate limiter, which retries throttling and runs summaries ahead of level
+    rewrites when the token budget is low. A summary that still fails falls
+    back to the source text and a failed level is left out, as before.
+
+    ``mode`` (``AZURE_OPENAI_GENERATION_MODE`` by default) selects between
+    ``per_level`` requests and a ``combined`` JSON request per article, in
+    which case only the parts that fail validation are requested separately.
+
+    ``levels`` optionally limits the CEFR levels generated per key; keys that
+    are not listed get every level.
+    """
+    results: dict[str, tuple[str, dict[str, str]]] = {
+        key: (source, {}) for key, source in sources.items()
+    }
+    if not deployment:
+        logging.info("AOAI deployment not set; skipping CEFR generation")
+        return results
+
+    pending = {key: source for key, source in sources.items() if source}
+    if not pending:
+        return results
+
+    workers = max_concurrency or _get_max_concurrency()
+    wanted: dict[str, tuple[str, ...]] = {}
+    for key in pending:
+        requested = set((levels or {}).get(key, CEFR_LEVELS))
+        wanted[key] = tuple(level for level in CEFR_LEVELS if level in requested)
+    missing: dict[str, set[str]] = {key: {"summary", *wanted[key]} for key in pending}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="aoai") as executor:
+        if (mode or _get_generation_mode()) == "combined":
+            combined_futures = {
+                key: executor.submit(_generate_combined, deployment, source, wanted[key])
+                for key, source in pending.items()
+            }
+            for key, future in combined_futures.items():
+                try:
+                    summary, level_texts = future.result()
+                except Exception:
+                    logging.exception("AOAI combined generation failed; falling back per level")
+                    continue
+                if summary is not None:
+                    results[key] = (summary, results[key][1])
+                    missing[key].discard("summary")
+                for level, text in level_texts.items():
+                    results[key][1][f"content_{level.lower()}"] = text
+                    missing[key].discard(level)
+
+        summary_futures = {
+            key: executor.submit(_generate, deployment, lambda s=source: summary_prompt(s), PRIORITY_HIGH, "summary")
+            for key, source in pending.items()
+            if "summary" in missing[key]
+        }
+        level_futures = {
+            (key, level): executor.submit(
+                _generate, deployment, lambda s=source, lv=level: cefr_prompt(lv, s), PRIORITY_LOW, f"cefr:{level}"
+            )
+            for key, source in pending.items()
+            for level in CEFR_LEVELS
+            if level in missing[key]
+        }
+
+        for key, future in summary_futures.items():
+            try:
+                results[key] = (future.result(), results[key][1])
+            except Exception:
+                logging.exception("AOAI summarization failed, using original content")
+
+        for (key, level), future in level_futures.items():
+            try:
+                results[key][1][f"content_{level.lower()}"] = future.result()
+            except Exception:
+                logging.exception("AOAI CEFR %s generation failed", level)
+    return results
+
+
+async def generate_level_text_async(deployment: str, source: str, level: str) -> str:
+    """Generate one CEFR rewrite on demand; unlike ``generate_texts``, failures raise."""
+    if not deployment:
+        raise RuntimeError("AOAI deployment not set")
+    system_prompt, user_prompt = cefr_prompt(level, source)
+    text = clean_plain_text(
+        await chat_once_async(
+            deployment=deployment,
+            message=user_prompt,
+            system_prompt=system_prompt,
+            priority=PRIORITY_HIGH,
+            operation=f"cefr:{level}",
+            max_retries=_get_interactive_max_retries(),
+        )
     )
-    return response.choices[0].message.content or ""
+    if not text:
+        raise ValueError(f"AOAI returned empty text for CEFR {level}")
+    return text
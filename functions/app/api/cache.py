@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Hashable
+
+from app.cosmos import async_repository
+from app.cosmos.repository import upsert_item
+
+_GENERATION_ID = "news_generation"
+_GENERATION_TYPE = "generation"
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after ``ttl_seconds``."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+
+
+response_cache = TTLCache(
+    max_entries=int(os.environ.get("HTTP_CACHE_MAX_ENTRIES", "1024")),
+    ttl_seconds=float(os.environ.get("HTTP_CACHE_TTL_SECONDS", "300")),
+)
+
+_generation_lock = threading.Lock()
+_generation: dict[str, Any] = {"value": None, "checked_at": 0.0}
+
+
+def _system_container() -> str:
+    return os.environ.get("COSMOS_SYSTEM_CONTAINER", "system")
+
+
+def _fresh_generation() -> str | None:
+    interval = float(os.environ.get("NEWS_GENERATION_CHECK_SECONDS", "60"))
+    with _generation_lock:
+        if _generation["value"] is not None and time.monotonic() - _generation["checked_at"] < interval:
+            return _generation["value"]
+    return None
+
+
+def _remember_generation(item: dict[str, Any] | None) -> str:
+    value = str((item or {}).get("value") or "0")
+    with _generation_lock:
+        _generation.update(value=value, checked_at=time.monotonic())
+    return value
+
+
+async def get_generation_async() -> str:
+    """Return the news generation marker, re-reading it at most once per check interval.
+
+    The nightly job bumps the marker after it writes new content, which
+    retires every cached news response on every instance.
+    """
+    value = _fresh_generation()
+    if value is not None:
+        return value
+    item = await async_repository.safe_read_item(_system_container(), _GENERATION_ID, _GENERATION_TYPE)
+    return _remember_generation(item)
+
+
+def bump_generation() -> str:
+    value = datetime.now(timezone.utc).isoformat()
+    upsert_item(
+        _system_container(),
+        {"id": _GENERATION_ID, "type": _GENERATION_TYPE, "value": value, "updatedAt": value},
+        partition_key=_GENERATION_TYPE,
+    )
+    with _generation_lock:
+        _generation.update(value=value, checked_at=time.monotonic())
+    return value
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import json
+import zlib
+from functools import lru_cache
+from typing import Any, AsyncIterable, Callable
+
+# Bodies smaller than this are sent uncompressed; the framing costs more than it saves.
+MIN_COMPRESS_BYTES = 1024
+_GZIP_LEVEL = 6
+_BROTLI_QUALITY = 5
+# 256 KB window instead of the default 4 MB keeps the compressor's memory small.
+_BROTLI_LGWIN = 18
+
+
+@lru_cache(maxsize=1)
+def _dumps() -> Callable[[Any], bytes]:
+    """Return a compact UTF-8 JSON encoder, orjson when it is installed."""
+    if importlib.util.find_spec("orjson") is not None:
+        import orjson  # type: ignore
+
+        return orjson.dumps
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    return lambda value: encoder.encode(value).encode("utf-8")
+
+
+@lru_cache(maxsize=1)
+def _brotli_available() -> bool:
+    return importlib.util.find_spec("brotli") is not None
+
+
+def dumps(value: Any) -> bytes:
+    return _dumps()(value)
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """Pick ``br`` or ``gzip`` from an ``Accept-Encoding`` header, or None for identity."""
+    offered: dict[str, float] = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        offered[name.strip().lower()] = quality
+    candidates = ["br", "gzip"] if _brotli_available() else ["gzip"]
+    best = max(candidates, key=lambda name: offered.get(name, offered.get("*", 0.0)))
+    return best if offered.get(best, offered.get("*", 0.0)) > 0 else None
+
+
+class _Identity:
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def flush(self) -> bytes:
+        return b""
+
+
+class _Gzip:
+    def __init__(self) -> None:
+        # wbits=31 writes the gzip header and trailer around the deflate stream.
+        self._compressor = zlib.compressobj(_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _Brotli:
+    def __init__(self) -> None:
+        import brotli  # type: ignore
+
+        self._compressor = brotli.Compressor(quality=_BROTLI_QUALITY, lgwin=_BROTLI_LGWIN)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+class JsonBodyWriter:
+    """Builds a JSON response body piece by piece.
+
+    Each piece is hashed (for the ETag) and passed straight to the
+    compressor, so neither the full object graph nor the uncompressed text
+    has to be held at once. ``finish`` returns the body bytes, the encoding
+    actually used, and the ETag. The ETag is a hash of the uncompressed
+    JSON, so it is the same for every encoding; compressed representations
+    carry it as a weak ETag.
+    """
+
+    def __init__(self, encoding: str | None = None) -> None:
+        self._requested = encoding
+        self._digest = hashlib.sha256()
+        self._pending: list[bytes] = []
+        self._pending_size = 0
+        self._chunks: list[bytes] = []
+        self._compressor: _Identity | _Gzip | _Brotli | None = None
+        self._first_item = True
+
+    def _start(self, compress: bool = True) -> None:
+        if compress and self._requested == "br" and _brotli_available():
+            self._compressor = _Brotli()
+        elif compress and self._requested == "gzip":
+            self._compressor = _Gzip()
+        else:
+            self._requested = None
+            self._compressor = _Identity()
+        for piece in self._pending:
+            self._emit(piece)
+        self._pending = []
+
+    def _emit(self, data: bytes) -> None:
+        out = self._compressor.compress(data)
+        if out:
+            self._chunks.append(out)
+
+    def raw(self, data: bytes) -> None:
+        self._digest.update(data)
+        if self._compressor is None:
+            # Small bodies stay uncompressed, so hold the first kilobyte before choosing.
+            self._pending.append(data)
+            self._pending_size += len(data)
+            if self._pending_size < MIN_COMPRESS_BYTES:
+                return
+            self._start()
+            return
+        self._emit(data)
+
+    def value(self, value: Any) -> None:
+        self.raw(dumps(value))
+
+    def item(self, value: Any) -> None:
+        """Write one element of the array opened by ``begin_array``."""
+        self.raw(dumps(value) if self._first_item else b"," + dumps(value))
+        self._first_item = False
+
+    def begin_array(self) -> None:
+        self.raw(b"[")
+        self._first_item = True
+
+    def end_array(self) -> None:
+        self.raw(b"]")
+
+    def finish(self) -> tuple[bytes, str | None, str]:
+        if self._compressor is None:
+            self._start(compress=False)
+        tail = self._compressor.flush()
+        if tail:
+            self._chunks.append(tail)
+        body = b"".join(self._chunks)
+        self._chunks = []
+        return body, self._requested, '"' + self._digest.hexdigest()[:32] + '"'
+
+
+async def write_list_object(
+    writer: JsonBodyWriter,
+    head: dict[str, Any],
+    key: str,
+    items: AsyncIterable[Any],
+    tail: Callable[[], dict[str, Any]],
+) -> None:
+    """Write ``{**head, key: [*items], **tail()}``, consuming ``items`` as they arrive.
+
+    ``tail`` is called after the items are exhausted, so it can report values
+    such as a continuation token that are only known at the end.
+    """
+    writer.raw(b"{")
+    for name, value in head.items():
+        writer.raw(dumps(name) + b":" + dumps(value) + b",")
+    writer.raw(dumps(key) + b":")
+    writer.begin_array()
+    async for item in items:
+        writer.item(item)
+    writer.end_array()
+    for name, value in tail().items():
+        writer.raw(b"," + dumps(name) + b":" + dumps(value))
+    writer.raw(b"}")
+
@@ -1,18 +1,34 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import logging
 import os
+import threading
 import time
 from typing import Any
 
-import jwt # type: ignore
-import requests # type: ignore
-from jwt import algorithms # type: ignore
+# jwt/cryptography and requests are imported inside the functions that use
+# them, so only routes that verify a token load them.
+
+_JWKS_TTL_SECONDS = 3600
+_UNKNOWN_KID_TTL_SECONDS = 60
+_MIN_REFRESH_INTERVAL_SECONDS = 30
+_VERIFIED_TOKEN_TTL_SECONDS = 300
+_VERIFIED_TOKEN_MAX_ENTRIES = 4096
 
 _JWKS_CACHE: dict[str, Any] = {
     "expires_at": 0.0,
+    "fetched_at": 0.0,
     "keys": {},
+    "public_keys": {},
+    "unknown_kids": {},
 }
+_JWKS_LOCK = threading.Lock()
+_REFRESH_LOCK = threading.Lock()
+
+_VERIFIED_TOKENS: dict[str, tuple[float, dict[str, Any]]] = {}
+_VERIFIED_LOCK = threading.Lock()
 
 
 def _get_jwks_url() -> str:
@@ -26,40 +42,145 @@ def _get_jwks_url() -> str:
 
 
 def _fetch_jwks() -> dict[str, dict[str, Any]]:
+    import requests # type: ignore
+    from jwt import algorithms # type: ignore
+
     url = _get_jwks_url()
     response = requests.get(url, timeout=5)
     response.raise_for_status()
     payload = response.json()
-    keys = {key["kid"]: key for key in payload.get("keys", []) if "kid" in key}
-    _JWKS_CACHE["keys"] = keys
-    _JWKS_CACHE["expires_at"] = time.time() + 3600
+    # Tokens are verified with RS256 only, so keep RSA signing keys; an EC or
+    # encryption key published alongside them must not break the refresh.
+    keys = {
+        key["kid"]: key
+        for key in payload.get("keys", [])
+        if "kid" in key and key.get("kty") == "RSA" and key.get("use", "sig") == "sig"
+    }
+    # Parse each key once per refresh instead of once per request.
+    public_keys = {}
+    for kid, key in keys.items():
+        try:
+            public_keys[kid] = algorithms.RSAAlgorithm.from_jwk(json.dumps(key))
+        except Exception:
+            logging.warning("Skipping JWK %s that failed to parse", kid, exc_info=True)
+    now = time.time()
+    with _JWKS_LOCK:
+        _JWKS_CACHE["keys"] = keys
+        _JWKS_CACHE["public_keys"] = public_keys
+        _JWKS_CACHE["expires_at"] = now + _JWKS_TTL_SECONDS
+        _JWKS_CACHE["fetched_at"] = now
+        _JWKS_CACHE["unknown_kids"] = {}
     return keys
 
 
-def _get_jwk(kid: str) -> dict[str, Any] | None:
-    if not _JWKS_CACHE.get("keys") or time.time() > _JWKS_CACHE.get("expires_at", 0):
-        _fetch_jwks()
-    keys = _JWKS_CACHE.get("keys", {})
-    if kid not in keys:
-        _fetch_jwks()
-        keys = _JWKS_CACHE.get("keys", {})
-    return keys.get(kid)
+def _refresh_jwks(seen_fetched_at: float, blocking: bool) -> None:
+    """Refresh the JWKS with at most one fetch in flight.
+
+    Blocking callers wait for an in-flight refresh and reuse its result
+    instead of fetching again.
+    """
+    if not _REFRESH_LOCK.acquire(blocking=blocking):
+        return
+    try:
+        if _JWKS_CACHE["fetched_at"] == seen_fetched_at:
+            _fetch_jwks()
+    finally:
+        _REFRESH_LOCK.release()
+
+
+def _refresh_in_background(seen_fetched_at: float) -> None:
+    def _run() -> None:
+        try:
+            _refresh_jwks(seen_fetched_at, blocking=False)
+        except Exception:
+            logging.warning("Background JWKS refresh failed; serving cached keys", exc_info=True)
+
+    threading.Thread(target=_run, name="jwks-refresh", daemon=True).start()
+
+
+def _get_public_key(kid: str) -> Any | None:
+    now = time.time()
+    with _JWKS_LOCK:
+        public_keys = _JWKS_CACHE["public_keys"]
+        fetched_at = _JWKS_CACHE["fetched_at"]
+        expired = now > _JWKS_CACHE["expires_at"]
+        unknown_until = _JWKS_CACHE["unknown_kids"].get(kid, 0.0)
+
+    if not public_keys:
+        _refresh_jwks(fetched_at, blocking=True)
+    elif expired and not _REFRESH_LOCK.locked():
+        # Stale-while-revalidate: keep serving the cached keys while one refresh runs.
+        _refresh_in_background(fetched_at)
+
+    with _JWKS_LOCK:
+        public_key = _JWKS_CACHE["public_keys"].get(kid)
+    if public_key is not None:
+        return public_key
+
+    # Unknown kid: refresh at most once per interval, and remember misses so a
+    # burst of bad or rotated tokens cannot hammer the JWKS endpoint.
+    with _JWKS_LOCK:
+        fetched_at = _JWKS_CACHE["fetched_at"]
+    if now < unknown_until or now - fetched_at < _MIN_REFRESH_INTERVAL_SECONDS:
+        return None
+    _refresh_jwks(fetched_at, blocking=True)
+    with _JWKS_LOCK:
+        public_key = _JWKS_CACHE["public_keys"].get(kid)
+        if public_key is None:
+            _JWKS_CACHE["unknown_kids"][kid] = time.time() + _UNKNOWN_KID_TTL_SECONDS
+    return public_key
+
+
+def _token_cache_key(token: str, issuer: str | None, audience: str | None) -> str:
+    return hashlib.sha256(f"{issuer}|{audience}|{token}".encode("utf-8")).hexdigest()
+
+
+def _get_verified(key: str) -> dict[str, Any] | None:
+    with _VERIFIED_LOCK:
+        entry = _VERIFIED_TOKENS.get(key)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if expires_at <= time.time():
+            del _VERIFIED_TOKENS[key]
+            return None
+        return payload
+
+
+def _remember_verified(key: str, payload: dict[str, Any]) -> None:
+    expires_at = time.time() + _VERIFIED_TOKEN_TTL_SECONDS
+    if isinstance(payload.get("exp"), (int, float)):
+        expires_at = min(expires_at, float(payload["exp"]))
+    with _VERIFIED_LOCK:
+        if len(_VERIFIED_TOKENS) >= _VERIFIED_TOKEN_MAX_ENTRIES:
+            now = time.time()
+            for stale in [k for k, (exp, _) in _VERIFIED_TOKENS.items() if exp <= now]:
+                del _VERIFIED_TOKENS[stale]
+            if len(_VERIFIED_TOKENS) >= _VERIFIED_TOKEN_MAX_ENTRIES:
+                _VERIFIED_TOKENS.pop(next(iter(_VERIFIED_TOKENS)))
+        _VERIFIED_TOKENS[key] = (expires_at, payload)
 
 
 def verify_clerk_jwt(token: str) -> dict[str, Any]:
     issuer = os.environ.get("CLERK_ISSUER")
     audience = os.environ.get("CLERK_AUDIENCE")
 
+    cache_key = _token_cache_key(token, issuer, audience)
+    cached = _get_verified(cache_key)
+    if cached is not None:
+        return cached
+
+    import jwt # type: ignore
+
     header = jwt.get_unverified_header(token)
     kid = header.get("kid")
     if not kid:
         raise ValueError("Token missing kid")
 
-    jwk = _get_jwk(kid)
-    if not jwk:
+    public_key = _get_public_key(kid)
+    if public_key is None:
         raise ValueError("Unable to find matching JWK")
 
-    public_key = algorithms.RSAAlgorithm.from_jwk(json.dumps(jwk))
     options = {"verify_aud": bool(audience)}
     payload = jwt.decode(
         token,
@@ -69,6 +190,7 @@ def verify_clerk_jwt(token: str) -> dict[str, Any]:
         audience=audience,
         options=options,
     )
+    _remember_verified(cache_key, payload)
     return payload
 
 
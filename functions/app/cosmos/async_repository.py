@@ -0,0 +1,193 @@
+"""Async twin of ``app.cosmos.repository`` for the HTTP handlers.
+
+Same function names and semantics, backed by ``azure.cosmos.aio`` so a
+request waiting on Cosmos yields the event loop instead of a worker thread.
+The nightly job keeps using the sync repository.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Any, AsyncIterator, Iterable
+
+from app.cosmos.client import cosmos_errors, get_async_container as get_container
+from app.cosmos.repository import _ID_QUERY_CHUNK, _chunks
+from app.telemetry.metrics import charge_hook, timed
+
+
+def _partition_kwargs(partition_key: str | None) -> dict[str, Any]:
+    # The async SDK fans out across partitions when no key is given; passing
+    # None would target the null partition instead.
+    return {} if partition_key is None else {"partition_key": partition_key}
+
+
+async def create_item(container_name: str, item: dict[str, Any], partition_key: str | None = None) -> dict[str, Any]:
+    container = get_container(container_name)
+    with timed("cosmos", f"create:{container_name}") as sample:
+        return await container.create_item(body=item, **charge_hook(sample))
+
+
+async def upsert_item(container_name: str, item: dict[str, Any], partition_key: str | None = None) -> dict[str, Any]:
+    container = get_container(container_name)
+    with timed("cosmos", f"upsert:{container_name}") as sample:
+        return await container.upsert_item(body=item, **charge_hook(sample))
+
+
+async def read_item(container_name: str, item_id: str, partition_key: str) -> dict[str, Any]:
+    container = get_container(container_name)
+    with timed("cosmos", f"read:{container_name}") as sample:
+        return await container.read_item(item=item_id, partition_key=partition_key, **charge_hook(sample))
+
+
+async def replace_item(
+    container_name: str,
+    item_id: str,
+    item: dict[str, Any],
+    partition_key: str,
+    etag: str | None = None,
+) -> dict[str, Any]:
+    container = get_container(container_name)
+    with timed("cosmos", f"replace:{container_name}") as sample:
+        if etag:
+            from azure.core import MatchConditions # type: ignore
+
+            return await container.replace_item(
+                item=item_id,
+                body=item,
+                etag=etag,
+                match_condition=MatchConditions.IfNotModified,
+                **charge_hook(sample),
+            )
+        return await container.replace_item(item=item_id, body=item, **charge_hook(sample))
+
+
+async def patch_item(
+    container_name: str,
+    item_id: str,
+    partition_key: str,
+    operations: list[dict[str, Any]],
+) -> dict[str, Any]:
+    """Apply partial-update operations, so concurrent writers of different fields do not clobber each other."""
+    container = get_container(container_name)
+    with timed("cosmos", f"patch:{container_name}") as sample:
+        return await container.patch_item(
+            item=item_id,
+            partition_key=partition_key,
+            patch_operations=operations,
+            **charge_hook(sample),
+        )
+
+
+async def delete_item(container_name: str, item_id: str, partition_key: str) -> None:
+    container = get_container(container_name)
+    with timed("cosmos", f"delete:{container_name}") as sample:
+        await container.delete_item(item=item_id, partition_key=partition_key, **charge_hook(sample))
+
+
+async def query_items(
+    container_name: str,
+    query: str,
+    parameters: Iterable[dict[str, Any]] | None = None,
+    partition_key: str | None = None,
+) -> list[dict[str, Any]]:
+    container = get_container(container_name)
+    with timed("cosmos", f"query:{container_name}") as sample:
+        items = container.query_items(
+            query=query,
+            parameters=list(parameters or []),
+            **_partition_kwargs(partition_key),
+            **charge_hook(sample),
+        )
+        return [item async for item in items]
+
+
+class PageStream:
+    """Items of one query page, yielded as they are read.
+
+    The query is sent on first iteration; ``continuation_token`` is available
+    once the page has been consumed.
+    """
+
+    def __init__(self, container_name: str, query_kwargs: dict[str, Any], continuation_token: str | None) -> None:
+        self._container_name = container_name
+        self._query_kwargs = query_kwargs
+        self._token = continuation_token
+        self._pager: Any = None
+
+    @property
+    def continuation_token(self) -> str | None:
+        return self._pager.continuation_token if self._pager is not None else None
+
+    async def __aiter__(self) -> AsyncIterator[dict[str, Any]]:
+        container = get_container(self._container_name)
+        with timed("cosmos", f"query:{self._container_name}") as sample:
+            items = container.query_items(**self._query_kwargs, **charge_hook(sample))
+            self._pager = items.by_page(self._token)
+            try:
+                page = await self._pager.__anext__()
+            except StopAsyncIteration:
+                return
+        async for item in page:
+            yield item
+
+
+def iter_page(
+    container_name: str,
+    query: str,
+    parameters: Iterable[dict[str, Any]] | None = None,
+    partition_key: str | None = None,
+    max_item_count: int = 50,
+    continuation_token: str | None = None,
+) -> PageStream:
+    query_kwargs = {
+        "query": query,
+        "parameters": list(parameters or []),
+        "max_item_count": max_item_count,
+        **_partition_kwargs(partition_key),
+    }
+    return PageStream(container_name, query_kwargs, continuation_token)
+
+
+async def query_page(
+    container_name: str,
+    query: str,
+    parameters: Iterable[dict[str, Any]] | None = None,
+    partition_key: str | None = None,
+    max_item_count: int = 50,
+    continuation_token: str | None = None,
+) -> tuple[list[dict[str, Any]], str | None]:
+    """Return one page of results and the continuation token for the next one."""
+    stream = iter_page(container_name, query, parameters, partition_key, max_item_count, continuation_token)
+    page = [item async for item in stream]
+    return page, stream.continuation_token
+
+
+async def safe_read_item(container_name: str, item_id: str, partition_key: str) -> dict[str, Any] | None:
+    try:
+        return await read_item(container_name, item_id, partition_key)
+    except cosmos_errors().CosmosResourceNotFoundError:
+        return None
+
+
+async def read_items_by_ids(
+    container_name: str,
+    item_ids: Iterable[str],
+    partition_key: str | None = None,
+    fields: Iterable[str] | None = None,
+) -> dict[str, dict[str, Any]]:
+    """Async ``read_items_by_ids``; the per-chunk queries run concurrently."""
+    ids = sorted(set(item_ids))
+    projection = "*"
+    if fields:
+        projection = ", ".join(f"c.{field}" for field in dict.fromkeys(["id", *fields]))
+    pages = await asyncio.gather(
+        *(
+            query_items(
+                container_name,
+                f"SELECT {projection} FROM c WHERE ARRAY_CONTAINS(@ids, c.id)",
+                parameters=[{"name": "@ids", "value": chunk}],
+                partition_key=partition_key,
+            )
+            for chunk in _chunks(ids, _ID_QUERY_CHUNK)
+        )
+    )
+    return {item["id"]: item for page in pages for item in page}
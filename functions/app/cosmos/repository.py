@@ -1,35 +1,40 @@
 from __future__ import annotations
 
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Iterable
 
-from azure.cosmos import exceptions as cosmos_exceptions # type: ignore
-
-from app.cosmos.client import get_container
+from app.cosmos.client import cosmos_errors, get_container
+from app.telemetry.metrics import charge_hook, timed
 
 
 def create_item(container_name: str, item: dict[str, Any], partition_key: str | None = None) -> dict[str, Any]:
     container = get_container(container_name)
-    try:
-        if partition_key is None:
-            return container.create_item(body=item)
-        return container.create_item(body=item, partition_key=partition_key)
-    except TypeError:
-        return container.create_item(body=item)
+    with timed("cosmos", f"create:{container_name}") as sample:
+        try:
+            if partition_key is None:
+                return container.create_item(body=item, **charge_hook(sample))
+            return container.create_item(body=item, partition_key=partition_key, **charge_hook(sample))
+        except TypeError:
+            return container.create_item(body=item, **charge_hook(sample))
 
 
 def upsert_item(container_name: str, item: dict[str, Any], partition_key: str | None = None) -> dict[str, Any]:
     container = get_container(container_name)
-    try:
-        if partition_key is None:
-            return container.upsert_item(body=item)
-        return container.upsert_item(body=item, partition_key=partition_key)
-    except TypeError:
-        return container.upsert_item(body=item)
+    with timed("cosmos", f"upsert:{container_name}") as sample:
+        try:
+            if partition_key is None:
+                return container.upsert_item(body=item, **charge_hook(sample))
+            return container.upsert_item(body=item, partition_key=partition_key, **charge_hook(sample))
+        except TypeError:
+            return container.upsert_item(body=item, **charge_hook(sample))
 
 
 def read_item(container_name: str, item_id: str, partition_key: str) -> dict[str, Any]:
     container = get_container(container_name)
-    return container.read_item(item=item_id, partition_key=partition_key)
+    with timed("cosmos", f"read:{container_name}") as sample:
+        return container.read_item(item=item_id, partition_key=partition_key, **charge_hook(sample))
 
 
 def replace_item(
@@ -37,14 +42,29 @@ def replace_item(
     item_id: str,
     item: dict[str, Any],
     partition_key: str,
+    etag: str | None = None,
 ) -> dict[str, Any]:
     container = get_container(container_name)
-    return container.replace_item(item=item_id, body=item, partition_key=partition_key)
+    with timed("cosmos", f"replace:{container_name}") as sample:
+        if etag:
+            from azure.core import MatchConditions # type: ignore
+
+            # Optimistic concurrency: fails with 412 if the item changed since it was read.
+            return container.replace_item(
+                item=item_id,
+                body=item,
+                partition_key=partition_key,
+                etag=etag,
+                match_condition=MatchConditions.IfNotModified,
+                **charge_hook(sample),
+            )
+        return container.replace_item(item=item_id, body=item, partition_key=partition_key, **charge_hook(sample))
 
 
 def delete_item(container_name: str, item_id: str, partition_key: str) -> None:
     container = get_container(container_name)
-    container.delete_item(item=item_id, partition_key=partition_key)
+    with timed("cosmos", f"delete:{container_name}") as sample:
+        container.delete_item(item=item_id, partition_key=partition_key, **charge_hook(sample))
 
 
 def query_items(
@@ -54,17 +74,146 @@ def query_items(
     partition_key: str | None = None,
 ) -> list[dict[str, Any]]:
     container = get_container(container_name)
-    items = container.query_items(
-        query=query,
-        parameters=list(parameters or []),
-        enable_cross_partition_query=partition_key is None,
-        partition_key=partition_key,
-    )
-    return list(items)
+    with timed("cosmos", f"query:{container_name}") as sample:
+        items = container.query_items(
+            query=query,
+            parameters=list(parameters or []),
+            enable_cross_partition_query=partition_key is None,
+            partition_key=partition_key,
+            **charge_hook(sample),
+        )
+        return list(items)
+
+
+def query_page(
+    container_name: str,
+    query: str,
+    parameters: Iterable[dict[str, Any]] | None = None,
+    partition_key: str | None = None,
+    max_item_count: int = 50,
+    continuation_token: str | None = None,
+) -> tuple[list[dict[str, Any]], str | None]:
+    """Return one page of results and the continuation token for the next one."""
+    container = get_container(container_name)
+    with timed("cosmos", f"query:{container_name}") as sample:
+        items = container.query_items(
+            query=query,
+            parameters=list(parameters or []),
+            enable_cross_partition_query=partition_key is None,
+            partition_key=partition_key,
+            max_item_count=max_item_count,
+            **charge_hook(sample),
+        )
+        pager = items.by_page(continuation_token)
+        page = list(next(pager, []))
+    return page, pager.continuation_token
 
 
 def safe_read_item(container_name: str, item_id: str, partition_key: str) -> dict[str, Any] | None:
     try:
         return read_item(container_name, item_id, partition_key)
-    except cosmos_exceptions.CosmosResourceNotFoundError:
+    except cosmos_errors().CosmosResourceNotFoundError:
         return None
+
+
+_ID_QUERY_CHUNK = 1000
+_BATCH_LIMIT = 100
+
+
+def _chunks(values: list[Any], size: int) -> Iterable[list[Any]]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def read_items_by_ids(
+    container_name: str,
+    item_ids: Iterable[str],
+    partition_key: str | None = None,
+    fields: Iterable[str] | None = None,
+) -> dict[str, dict[str, Any]]:
+    """Read many items with one ``ARRAY_CONTAINS`` query per chunk of ids.
+
+    Pass ``partition_key`` when all ids share one partition to avoid a
+    cross-partition query, and ``fields`` to project only what is needed.
+    """
+    ids = sorted(set(item_ids))
+    projection = "*"
+    if fields:
+        projection = ", ".join(f"c.{field}" for field in dict.fromkeys(["id", *fields]))
+    found: dict[str, dict[str, Any]] = {}
+    for chunk in _chunks(ids, _ID_QUERY_CHUNK):
+        for item in query_items(
+            container_name,
+            f"SELECT {projection} FROM c WHERE ARRAY_CONTAINS(@ids, c.id)",
+            parameters=[{"name": "@ids", "value": chunk}],
+            partition_key=partition_key,
+        ):
+            found[item["id"]] = item
+    return found
+
+
+def read_existing_ids(
+    container_name: str,
+    item_ids: Iterable[str],
+    partition_key: str | None = None,
+) -> set[str]:
+    ids = sorted(set(item_ids))
+    existing: set[str] = set()
+    for chunk in _chunks(ids, _ID_QUERY_CHUNK):
+        existing.update(
+            query_items(
+                container_name,
+                "SELECT VALUE c.id FROM c WHERE ARRAY_CONTAINS(@ids, c.id)",
+                parameters=[{"name": "@ids", "value": chunk}],
+                partition_key=partition_key,
+            )
+        )
+    return existing
+
+
+def _upsert_partition(container_name: str, partition_key: str, items: list[dict[str, Any]]) -> None:
+    if len(items) == 1:
+        upsert_item(container_name, items[0], partition_key=partition_key)
+        return
+    container = get_container(container_name)
+    for chunk in _chunks(items, _BATCH_LIMIT):
+        with timed("cosmos", f"batch:{container_name}") as sample:
+            container.execute_item_batch(
+                batch_operations=[("upsert", (item,)) for item in chunk],
+                partition_key=partition_key,
+                **charge_hook(sample),
+            )
+
+
+def upsert_items(
+    container_name: str,
+    items: Iterable[dict[str, Any]],
+    partition_key_field: str = "id",
+    max_concurrency: int | None = None,
+) -> int:
+    """Upsert items grouped by partition key.
+
+    Items that share a partition go out as transactional batches of up to 100
+    operations; partitions are written concurrently. A failed partition is
+    logged and skipped, and the number of items written is returned.
+    """
+    groups: dict[str, list[dict[str, Any]]] = {}
+    for item in items:
+        groups.setdefault(item[partition_key_field], []).append(item)
+    if not groups:
+        return 0
+
+    workers = max_concurrency or int(os.environ.get("COSMOS_BULK_CONCURRENCY", "8"))
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(groups)))) as executor:
+        futures = {
+            partition_key: executor.submit(_upsert_partition, container_name, partition_key, group)
+            for partition_key, group in groups.items()
+        }
+        written = 0
+        for partition_key, future in futures.items():
+            try:
+                future.result()
+                written += len(groups[partition_key])
+            except Exception:
+                logging.exception("Cosmos bulk upsert failed for partition %s", partition_key)
+    return written
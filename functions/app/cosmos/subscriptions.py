@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Iterable
+
+from app.cosmos import async_repository
+from app.cosmos.client import cosmos_errors
+from app.cosmos.repository import query_items, upsert_items
+
+_MAX_ATTEMPTS = 5
+_BUILT_MARKER_ID = "_index_built"
+
+
+def _container() -> str:
+    return os.environ.get("COSMOS_SUBSCRIPTIONS_CONTAINER", "subscriptions")
+
+
+def _index_doc(company: str, subscribers: Iterable[str]) -> dict:
+    return {
+        "id": company,
+        "type": "subscription_index",
+        "company": company,
+        "subscribers": sorted(set(subscribers)),
+        "updatedAt": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def enabled_companies(user: dict | None) -> set[str]:
+    company_flags = (user or {}).get("company") or {}
+    if not isinstance(company_flags, dict):
+        return set()
+    return {name for name, enabled in company_flags.items() if enabled}
+
+
+def _next_subscribers(doc: dict, user_id: str, subscribe: bool) -> set[str] | None:
+    """Return the updated subscriber set, or None when the document already agrees."""
+    subscribers = set(doc.get("subscribers") or [])
+    if (user_id in subscribers) == subscribe:
+        return None
+    if subscribe:
+        subscribers.add(user_id)
+    else:
+        subscribers.discard(user_id)
+    return subscribers
+
+
+async def _apply_async(company: str, user_id: str, subscribe: bool) -> None:
+    """Add or remove one subscriber with an etag-guarded read-modify-write."""
+    container = _container()
+    for _ in range(_MAX_ATTEMPTS):
+        doc = await async_repository.safe_read_item(container, company, company)
+        try:
+            if doc is None:
+                if subscribe:
+                    await async_repository.create_item(container, _index_doc(company, [user_id]), partition_key=company)
+                return
+            subscribers = _next_subscribers(doc, user_id, subscribe)
+            if subscribers is None:
+                return
+            await async_repository.replace_item(
+                container, company, _index_doc(company, subscribers), company, etag=doc.get("_etag")
+            )
+            return
+        except (cosmos_errors().CosmosAccessConditionFailedError, cosmos_errors().CosmosResourceExistsError):
+            # Another writer got there first; re-read and try again.
+            continue
+    raise RuntimeError(f"Subscription index update for {company} kept conflicting")
+
+
+async def update_subscriptions_async(user_id: str, previous: set[str], current: set[str]) -> None:
+    """Record a user's subscription changes; each company is its own document, so they are updated concurrently."""
+    await asyncio.gather(
+        *(_apply_async(company, user_id, subscribe=True) for company in sorted(current - previous)),
+        *(_apply_async(company, user_id, subscribe=False) for company in sorted(previous - current)),
+    )
+
+
+def read_subscribers() -> dict[str, list[str]] | None:
+    """Return company -> subscriber ids, or None until the index has been built once.
+
+    Settings saves only record changes, so users who saved before the index
+    existed are picked up by ``rebuild_index`` from a full users scan.
+    """
+    docs = query_items(_container(), "SELECT c.id, c.company, c.subscribers FROM c")
+    if not any(doc.get("id") == _BUILT_MARKER_ID for doc in docs):
+        return None
+    return {
+        doc["company"]: list(doc.get("subscribers") or [])
+        for doc in docs
+        if doc.get("company") and doc.get("subscribers")
+    }
+
+
+def rebuild_index(subscribers: dict[str, list[str]]) -> None:
+    docs = [_index_doc(company, users) for company, users in subscribers.items()]
+    upsert_items(_container(), docs)
+    marker = {"id": _BUILT_MARKER_ID, "type": "subscription_index_marker"}
+    upsert_items(_container(), [marker])
+    logging.info("Rebuilt subscription index for %s companies", len(docs))
@@ -0,0 +1 @@
+"""News pipeline helpers."""
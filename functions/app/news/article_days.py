@@ -0,0 +1,51 @@
+"""Day-partitioned copy of the shared articles for range queries.
+
+``articles`` is partitioned by ``/id``: every by-article access (detail,
+``/text``, lazy level patches, queue workers) knows only the id. Listing by
+date does not, and over ``/id`` it fans out to every physical partition.
+The ``article_days`` container (``COSMOS_ARTICLE_DAYS_CONTAINER``, partition
+key ``/dayKey``) holds the same documents, written alongside ``articles``,
+so range queries name only the days they cover.
+
+Fill it for existing articles with
+``python -m tools.migrate_news_partitions --source articles --target article_days``.
+"""
+from __future__ import annotations
+
+import logging
+import os
+from typing import Any, Iterable
+
+from app.cosmos import async_repository
+from app.cosmos.repository import upsert_items
+from app.news.partitions import DAY_KEY_FIELD, day_key
+
+
+def article_days_container() -> str:
+    return os.environ.get("COSMOS_ARTICLE_DAYS_CONTAINER", "article_days")
+
+
+def with_day_key(article: dict[str, Any]) -> dict[str, Any]:
+    if article.get(DAY_KEY_FIELD):
+        return article
+    return {**article, DAY_KEY_FIELD: day_key(article["fetchedAt"])}
+
+
+def save_day_copies(articles: Iterable[dict[str, Any]]) -> int:
+    """Upsert the listing copies; returns the number written, like ``upsert_items``."""
+    return upsert_items(
+        article_days_container(),
+        [with_day_key(article) for article in articles],
+        partition_key_field=DAY_KEY_FIELD,
+    )
+
+
+async def patch_day_copy_async(article: dict[str, Any], operations: list[dict[str, Any]]) -> None:
+    """Apply a patch made to ``articles`` to the listing copy as well."""
+    try:
+        await async_repository.patch_item(
+            article_days_container(), article["id"], with_day_key(article)[DAY_KEY_FIELD], operations
+        )
+    except Exception:
+        # Listings fall back to the summary until the copy is rewritten.
+        logging.exception("Failed to patch the listing copy of article %s", article["id"])
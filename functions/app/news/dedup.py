@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from typing import Any
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+_TRACKING_PARAMS = {"fbclid", "gclid", "igshid", "mc_cid", "mc_eid", "ref", "ref_src", "source"}
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Tavily snippets are short, so single-word shingles: with longer shingles one
+# edited word flips too many features and near-duplicates drift apart.
+_SHINGLE_SIZE = 1
+_BANDS = 8
+_BAND_BITS = 64 // _BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+
+def canonicalize_url(url: str) -> str:
+    """Normalise a URL so tracking-parameter and host variants compare equal."""
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower().removeprefix("www.")
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    query = urlencode(
+        sorted(
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not key.lower().startswith("utm_") and key.lower() not in _TRACKING_PARAMS
+        )
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(("https", host, path, query, ""))
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over word shingles; similar texts differ in few bits."""
+    tokens = _TOKEN_RE.findall((text or "").lower())
+    if not tokens:
+        return 0
+    shingles = [" ".join(tokens[i:i + _SHINGLE_SIZE]) for i in range(max(1, len(tokens) - _SHINGLE_SIZE + 1))]
+    weights = [0] * 64
+    for shingle in shingles:
+        value = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def fingerprint(result: dict[str, Any]) -> tuple[str, str]:
+    """Return ``(canonicalUrl, simhash hex)`` for a Tavily result.
+
+    The hash is stored as hex because Cosmos numbers cannot hold 64 bits exactly.
+    """
+    text = f"{result.get('title', '')} {result.get('content', '')}"
+    return canonicalize_url(result.get("url", "")), f"{simhash(text):016x}"
+
+
+class FingerprintIndex:
+    """In-memory lookup of recent articles by canonical URL and SimHash.
+
+    SimHashes are split into eight 8-bit bands; any two hashes within seven
+    bits of each other share at least one band, so only those candidates are
+    compared.
+    """
+
+    def __init__(self, max_distance: int = 7) -> None:
+        self._max_distance = max_distance
+        self._by_url: dict[str, dict[str, Any]] = {}
+        self._bands: dict[tuple[int, int], list[tuple[int, dict[str, Any]]]] = {}
+
+    def add(self, article: dict[str, Any]) -> None:
+        canonical_url = article.get("canonicalUrl") or canonicalize_url(article.get("url", ""))
+        if canonical_url:
+            self._by_url.setdefault(canonical_url, article)
+        if article.get("simhash"):
+            value = int(article["simhash"], 16)
+            for band in range(_BANDS):
+                key = (band, value >> (band * _BAND_BITS) & _BAND_MASK)
+                self._bands.setdefault(key, []).append((value, article))
+
+    def find(self, canonical_url: str, simhash_hex: str) -> dict[str, Any] | None:
+        if canonical_url and canonical_url in self._by_url:
+            return self._by_url[canonical_url]
+        value = int(simhash_hex, 16)
+        if not value:
+            return None
+        for band in range(_BANDS):
+            for other, article in self._bands.get((band, value >> (band * _BAND_BITS) & _BAND_MASK), []):
+                if bin(value ^ other).count("1") <= self._max_distance:
+                    return article
+        return None
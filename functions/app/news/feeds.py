@@ -0,0 +1,299 @@
+"""Per-user Home feed documents.
+
+Each user has one document in the feeds container (partition key
+``/userId``, ``id`` = userId). It holds the last ``FEED_DAYS`` days of
+article references, with headline metadata and a short preview at the
+user's level, so Home is a single point read. The nightly job merges new
+articles into the feeds of their companies' subscribers; in queue mode the
+workers refresh those items' previews once the text is generated. Saving
+settings rebuilds the user's feed.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Iterable
+
+from app.aoai.service import CEFR_LEVELS
+from app.cosmos import async_repository
+from app.cosmos.client import cosmos_errors
+from app.cosmos.repository import (
+    _chunks,
+    create_item,
+    query_items,
+    read_items_by_ids,
+    replace_item,
+    safe_read_item,
+)
+from app.cosmos.subscriptions import enabled_companies, read_subscribers
+from app.news.article_days import article_days_container
+from app.news.levels import user_level
+from app.news.partitions import day_key_condition
+
+FEED_TYPE = "user_feed"
+FEED_DAYS = 7
+# Home shows 120 characters and the settings screen 140.
+_PREVIEW_CHARS = 160
+_USER_CHUNK = 1000
+_MAX_ATTEMPTS = 5
+_HEADLINE_FIELDS = ["id", "title", "url", "date", "fetchedAt", "company", "companyType"]
+
+
+def _feeds_container() -> str:
+    return os.environ.get("COSMOS_FEEDS_CONTAINER", "feeds")
+
+
+def _users_container() -> str:
+    return os.environ.get("COSMOS_USERS_CONTAINER", "users")
+
+
+def _articles_container() -> str:
+    return os.environ.get("COSMOS_ARTICLES_CONTAINER", "articles")
+
+
+def _max_items() -> int:
+    return int(os.environ.get("NEWS_FEED_MAX_ITEMS", "200"))
+
+
+def _since(now: str) -> str:
+    return (datetime.fromisoformat(now) - timedelta(days=FEED_DAYS)).isoformat()
+
+
+def _preview(text: str) -> str:
+    return text if len(text) <= _PREVIEW_CHARS else text[:_PREVIEW_CHARS].rstrip() + "…"
+
+
+def feed_item(article: dict[str, Any], level: str) -> dict[str, Any]:
+    item = {field: article[field] for field in _HEADLINE_FIELDS if article.get(field) is not None}
+    # content_* always means full text; the shortened one has its own field.
+    # A level not generated yet (queue or lazy mode) falls back to the summary like the app does.
+    item["preview"] = _preview(article.get(f"content_{level.lower()}") or article.get("content") or "")
+    return item
+
+
+def _sorted_items(items: Iterable[dict[str, Any]], since: str) -> list[dict[str, Any]]:
+    by_id: dict[str, dict[str, Any]] = {}
+    for item in items:
+        if (item.get("fetchedAt") or "") >= since:
+            by_id[item["id"]] = item
+    ordered = sorted(by_id.values(), key=lambda item: item.get("fetchedAt") or "", reverse=True)
+    return ordered[: _max_items()]
+
+
+def _feed_doc(user_id: str, companies: Iterable[str], level: str, items: list[dict], now: str) -> dict[str, Any]:
+    return {
+        "id": user_id,
+        "userId": user_id,
+        "type": FEED_TYPE,
+        "companies": sorted(companies),
+        "level": level,
+        "items": items,
+        "updatedAt": now,
+    }
+
+
+def _article_fields(levels: Iterable[str]) -> list[str]:
+    fields = ["content", "generationStatus", *(f"content_{level.lower()}" for level in sorted(set(levels)))]
+    return [*_HEADLINE_FIELDS, *fields]
+
+
+def _recent_articles_query(
+    company_types: list[str], levels: Iterable[str], since: str, until: str
+) -> tuple[str, list[dict]]:
+    """Query over ``article_days`` that reads only the partitions of the days in range."""
+    parameters: list[dict] = [{"name": "@since", "value": since}, {"name": "@companyTypes", "value": company_types}]
+    query = (
+        f"SELECT {', '.join(f'c.{field}' for field in _article_fields(levels))} FROM c "
+        f"WHERE {day_key_condition(since, until, parameters)} AND c.fetchedAt >= @since "
+        "AND ARRAY_CONTAINS(@companyTypes, c.companyType)"
+    )
+    return query, parameters
+
+
+def _save_feed(
+    user_id: str,
+    feed: dict[str, Any] | None,
+    build: Callable[[dict[str, Any] | None], dict[str, Any] | None],
+) -> bool:
+    """Write ``build(feed)`` guarded by the feed's etag, rebuilding from the stored feed on conflict.
+
+    Queue workers refresh previews in the same documents while the job
+    merges new articles, so neither may overwrite the other. ``build``
+    returns None when nothing changes. Returns whether a write happened.
+    """
+    errors = cosmos_errors()
+    for _ in range(_MAX_ATTEMPTS):
+        doc = build(feed)
+        if doc is None:
+            return False
+        try:
+            if feed is None:
+                create_item(_feeds_container(), doc, partition_key=user_id)
+            else:
+                replace_item(_feeds_container(), user_id, doc, user_id, etag=feed.get("_etag"))
+            return True
+        except (
+            errors.CosmosAccessConditionFailedError,
+            errors.CosmosResourceExistsError,
+            errors.CosmosResourceNotFoundError,
+        ):
+            # Another writer got there first (or settings dropped the feed); start from what is stored now.
+            feed = safe_read_item(_feeds_container(), user_id, user_id)
+    raise RuntimeError(f"Feed update for {user_id} kept conflicting")
+
+
+def update_feeds(
+    company_articles: dict[str, list[dict[str, Any]]],
+    subscribers: dict[str, list[str]],
+    now: str,
+) -> int:
+    """Merge this run's articles into the feeds of the affected users.
+
+    Only subscribers of companies that gained articles are read and
+    rewritten, in chunks of users. A feed whose item list would not change
+    is left alone. Users without a feed get one built from the last
+    ``FEED_DAYS`` days of articles. Raises if any write fails, so the job
+    stage is retried; merging is idempotent.
+    """
+    user_companies: dict[str, set[str]] = {}
+    for company, articles in company_articles.items():
+        if articles:
+            for user_id in subscribers.get(company, []):
+                user_companies.setdefault(user_id, set()).add(company)
+    if not user_companies:
+        return 0
+    # The run's articles as stored after generation, with every level's text.
+    stored = read_items_by_ids(
+        _articles_container(),
+        [article["id"] for articles in company_articles.values() for article in articles],
+        fields=_article_fields(CEFR_LEVELS),
+    )
+    since = _since(now)
+    recent: list[list[dict[str, Any]]] = []
+    recent_lock = threading.Lock()
+
+    def recent_articles() -> list[dict[str, Any]]:
+        # One query serves every user in this run that has no feed yet.
+        with recent_lock:
+            if not recent:
+                query, parameters = _recent_articles_query(
+                    sorted(company.lower() for company in subscribers), CEFR_LEVELS, since, now
+                )
+                recent.append(query_items(article_days_container(), query, parameters=parameters))
+            return recent[0]
+
+    def builder(user_id: str, user: dict[str, Any] | None) -> Callable[[dict | None], dict | None]:
+        level = user_level(user)
+        # The index was read at job start; a user who changed companies since
+        # then is held to their current settings.
+        companies = enabled_companies(user) if user is not None else user_companies[user_id]
+        delivered = sorted(user_companies[user_id] & companies)
+
+        def build(feed: dict[str, Any] | None) -> dict[str, Any] | None:
+            if feed is None or feed.get("level") != level:
+                candidates = [article for article in recent_articles() if article.get("company") in companies]
+                items = _sorted_items((feed_item(article, level) for article in candidates), since)
+            else:
+                existing = feed.get("items") or []
+                # Like user references, an article is dated by the run that delivered it.
+                new_items = [
+                    feed_item({**stored.get(article["id"], article), "company": company,
+                               "companyType": company.lower(), "fetchedAt": now}, level)
+                    for company in delivered
+                    for article in company_articles[company]
+                ]
+                # Existing entries come last so they keep their original position
+                # (and any preview a worker refreshed meanwhile).
+                items = _sorted_items([*new_items, *existing], since)
+                if [item["id"] for item in items] == [item["id"] for item in existing]:
+                    return None
+            return _feed_doc(user_id, companies, level, items, now)
+
+        return build
+
+    workers = int(os.environ.get("COSMOS_BULK_CONCURRENCY", "8"))
+    written = unchanged = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for chunk in _chunks(sorted(user_companies), _USER_CHUNK):
+            users = read_items_by_ids(_users_container(), chunk, fields=["level", "company"])
+            feeds = read_items_by_ids(_feeds_container(), chunk, fields=["level", "items", "_etag"])
+            futures = [
+                executor.submit(_save_feed, user_id, feeds.get(user_id), builder(user_id, users.get(user_id)))
+                for user_id in chunk
+            ]
+            for future in futures:
+                if future.result():
+                    written += 1
+                else:
+                    unchanged += 1
+
+    # A worker that finished between the reads above and these writes found
+    # no item to refresh, so catch up on what is no longer pending.
+    pending = {
+        article["id"]
+        for article in [*stored.values(), *(recent[0] if recent else [])]
+        if article.get("generationStatus") == "pending"
+    }
+    if pending:
+        for article in read_items_by_ids(_articles_container(), pending, fields=_article_fields(CEFR_LEVELS)).values():
+            if article.get("generationStatus") != "pending":
+                refresh_feed_items(article)
+    logging.info("Updated %s user feeds (%s unchanged)", written, unchanged)
+    return written
+
+
+def _refreshed(feed: dict[str, Any], article: dict[str, Any]) -> dict[str, Any] | None:
+    """The feed with the article's preview regenerated, or None when nothing changes."""
+    preview = feed_item(article, feed.get("level") or "")["preview"]
+    items = feed.get("items") or []
+    if not any(item.get("id") == article["id"] and item.get("preview") != preview for item in items):
+        return None
+    doc = {key: value for key, value in feed.items() if not key.startswith("_")}
+    doc["items"] = [
+        {**item, "preview": preview} if item.get("id") == article["id"] else item for item in items
+    ]
+    return doc
+
+
+def refresh_feed_items(article: dict[str, Any]) -> int:
+    """Update the article's preview in its subscribers' feeds after a queue worker generated it.
+
+    The feeds stage may run before the text exists, and then stores a
+    preview of the raw snippet. Returns the number of feeds written.
+    """
+    user_ids = (read_subscribers() or {}).get(article.get("company") or "", [])
+    written = 0
+    for chunk in _chunks(sorted(user_ids), _USER_CHUNK):
+        for user_id, feed in read_items_by_ids(_feeds_container(), chunk).items():
+            written += _save_feed(user_id, feed, lambda current: _refreshed(current, article) if current else None)
+    return written
+
+
+async def read_feed_async(user_id: str) -> dict[str, Any] | None:
+    return await async_repository.safe_read_item(_feeds_container(), user_id, user_id)
+
+
+async def rebuild_feed_async(user_id: str, user: dict[str, Any]) -> None:
+    """Rebuild one user's feed from scratch after their companies or level changed."""
+    now = datetime.now(timezone.utc).isoformat()
+    since = _since(now)
+    level = user_level(user)
+    companies = enabled_companies(user)
+    items: list[dict[str, Any]] = []
+    if companies:
+        query, parameters = _recent_articles_query(sorted(c.lower() for c in companies), [level], since, now)
+        articles = await async_repository.query_items(article_days_container(), query, parameters=parameters)
+        items = _sorted_items((feed_item(article, level) for article in articles), since)
+    doc = _feed_doc(user_id, companies, level, items, now)
+    await async_repository.upsert_item(_feeds_container(), doc, partition_key=user_id)
+
+
+async def drop_feed_async(user_id: str) -> None:
+    """Delete a feed that could not be rebuilt, so reads fall back to the reference query."""
+    try:
+        await async_repository.delete_item(_feeds_container(), user_id, user_id)
+    except Exception:
+        logging.exception("Failed to drop stale feed for user %s", user_id)
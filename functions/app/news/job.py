@@ -0,0 +1,595 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from app.aoai.cache import get_cache_stats
+from app.aoai.limiter import get_limiter_stats
+from app.aoai.service import generate_texts
+from app.api.cache import bump_generation
+from app.cosmos.client import cosmos_errors
+from app.cosmos.repository import (
+    create_item,
+    query_items,
+    read_existing_ids,
+    read_items_by_ids,
+    replace_item,
+    safe_read_item,
+    upsert_item,
+    upsert_items,
+)
+from app.cosmos.subscriptions import read_subscribers, rebuild_index
+from app.news.article_days import article_days_container, save_day_copies
+from app.news.dedup import FingerprintIndex, fingerprint
+from app.news.feeds import refresh_feed_items, update_feeds
+from app.news.levels import generation_mode as level_generation_mode, subscriber_levels
+from app.news.partitions import (
+    DAY_KEY_FIELD,
+    day_key,
+    day_key_condition,
+    news_partition_key,
+    partition_key_value,
+    shared_partition_value,
+)
+from app.news.watermarks import advance, filter_unseen, read_watermarks, save_watermarks, start_date_for
+from app.tavily.service import search_company_news
+from app.telemetry.metrics import emit_summary, recorder, timed
+
+JOB_STATE_ID = "news_update_state"
+JOB_STATE_TYPE = "job_state"
+JOB_QUEUE_NAME = "news-jobs"
+
+_REFERENCE_FIELDS = ["url", "title", "date", "content"]
+_RESUMABLE_STATUSES = ("running", "paused", "failed")
+
+
+class Deadline:
+    """Time budget for one invocation, leaving ``reserve_seconds`` to checkpoint and exit."""
+
+    def __init__(self, budget_seconds: float, reserve_seconds: float = 30.0) -> None:
+        self._ends_at = time.monotonic() + budget_seconds
+        self._reserve_seconds = reserve_seconds
+
+    @classmethod
+    def from_env(cls) -> "Deadline":
+        return cls(
+            budget_seconds=float(os.environ.get("NEWS_JOB_TIME_BUDGET_SECONDS", "240")),
+            reserve_seconds=float(os.environ.get("NEWS_JOB_TIME_RESERVE_SECONDS", "30")),
+        )
+
+    def remaining(self) -> float:
+        return self._ends_at - time.monotonic()
+
+    def expired(self) -> bool:
+        return self.remaining() <= self._reserve_seconds
+
+
+def _system_container() -> str:
+    return os.environ.get("COSMOS_SYSTEM_CONTAINER", "system")
+
+
+def _articles_container() -> str:
+    return os.environ.get("COSMOS_ARTICLES_CONTAINER", "articles")
+
+
+def _generation_mode() -> str:
+    mode = os.environ.get("NEWS_JOB_GENERATION_MODE", "inline").strip().lower()
+    return mode if mode in ("inline", "queue") else "inline"
+
+
+def _collect_company_subscribers(users: list[dict]) -> dict[str, list[str]]:
+    subscribers: dict[str, list[str]] = {}
+    for user in users:
+        user_id = user.get("userId") or user.get("id")
+        company_flags = user.get("company") or {}
+        if not user_id or not isinstance(company_flags, dict):
+            continue
+        for name, enabled in company_flags.items():
+            if enabled:
+                subscribers.setdefault(name, []).append(user_id)
+    return subscribers
+
+
+def _article_id(url: str, title: str, content: str) -> str:
+    digest = hashlib.sha256(f"{url or title or content}".encode("utf-8")).hexdigest()
+    return f"art_{digest}"
+
+
+def _build_article(article_id: str, company: str, result: dict, now: str) -> dict:
+    article = {
+        "id": article_id,
+        "type": "article",
+        "company": company,
+        "companyType": company.lower(),
+        "title": result.get("title", ""),
+        "content": result.get("content", "") or result.get("title", ""),
+        "date": result.get("published_date") or result.get("published_at"),
+        "fetchedAt": now,
+        DAY_KEY_FIELD: day_key(now),
+    }
+    if result.get("url"):
+        article["url"] = result["url"]
+    return article
+
+
+def _build_user_reference(user_id: str, company: str, article: dict, now: str) -> dict:
+    url = article.get("url", "")
+    title = article.get("title", "")
+    item_id = hashlib.sha256(f"{user_id}:{url or title or article.get('content', '')}".encode("utf-8")).hexdigest()
+    return {
+        "id": item_id,
+        "userId": user_id,
+        "articleId": article["id"],
+        "company": company,
+        "companyType": company.lower(),
+        "title": title,
+        "date": article.get("date"),
+        "fetchedAt": now,
+        DAY_KEY_FIELD: day_key(now),
+    }
+
+
+def _load_fingerprint_index() -> FingerprintIndex:
+    window_days = int(os.environ.get("NEWS_DEDUP_WINDOW_DAYS", "30"))
+    now = datetime.now(timezone.utc)
+    since = (now - timedelta(days=window_days)).isoformat()
+    index = FingerprintIndex(max_distance=int(os.environ.get("NEWS_DEDUP_MAX_DISTANCE", "7")))
+    fields = ", ".join(f"c.{field}" for field in ["id", *_REFERENCE_FIELDS, "canonicalUrl", "simhash"])
+    parameters: list[dict[str, Any]] = [{"name": "@since", "value": since}]
+    # The window's day partitions of the listing copy, not a scan of every article.
+    condition = day_key_condition(since, now.isoformat(), parameters)
+    for article in query_items(
+        article_days_container(),
+        f"SELECT {fields} FROM c WHERE {condition} AND c.fetchedAt >= @since",
+        parameters=parameters,
+    ):
+        index.add(article)
+    return index
+
+
+def _load_subscribers() -> dict[str, list[str]]:
+    # Subscriptions come from the per-company index; the users container is only
+    # scanned once, to build the index the first time.
+    subscribers = read_subscribers()
+    if subscribers is None:
+        users_container = os.environ.get("COSMOS_USERS_CONTAINER", "users")
+        subscribers = _collect_company_subscribers(query_items(users_container, "SELECT * FROM c"))
+        rebuild_index(subscribers)
+    return subscribers
+
+
+def _new_state(now: str) -> dict[str, Any]:
+    return {
+        "id": JOB_STATE_ID,
+        "type": JOB_STATE_TYPE,
+        "jobName": "news_update",
+        "runId": uuid.uuid4().hex,
+        "status": "running",
+        "stage": "fetch",
+        "startedAt": now,
+        "lastRunAt": now,
+        "lastRunDateJst": day_key(now),
+        "saved": 0,
+        "skippedDuplicates": 0,
+        "error": None,
+        "failures": 0,
+        "leaseUntil": None,
+    }
+
+
+def _lease_seconds() -> float:
+    return float(os.environ.get("NEWS_JOB_LEASE_SECONDS", "600"))
+
+
+def _save_state(state: dict[str, Any], release: bool = False) -> None:
+    """Write the state, renewing this invocation's lease (or releasing it).
+
+    The write is guarded by the etag of the last one, so an invocation whose
+    lease expired and was taken over fails here instead of overwriting.
+    """
+    now = datetime.now(timezone.utc)
+    state["updatedAt"] = now.isoformat()
+    state["leaseUntil"] = None if release else (now + timedelta(seconds=_lease_seconds())).isoformat()
+    body = {key: value for key, value in state.items() if not key.startswith("_")}
+    saved = replace_item(_system_container(), JOB_STATE_ID, body, JOB_STATE_TYPE, etag=state.get("_etag"))
+    state["_etag"] = saved.get("_etag")
+
+
+def _resumable(state: dict[str, Any] | None, now: datetime) -> bool:
+    if not state or state.get("status") not in _RESUMABLE_STATUSES or state.get("stage") == "done":
+        return False
+    # A run that keeps failing, or is still unfinished by the timer after the
+    # one that would resume it, is dropped; the watermarks only advanced for
+    # what it persisted, so a new run refetches the rest. The default age
+    # must exceed the daily schedule, or a failed run could never resume.
+    max_failures = int(os.environ.get("NEWS_JOB_MAX_FAILURES", "3"))
+    max_age = timedelta(hours=float(os.environ.get("NEWS_JOB_MAX_AGE_HOURS", "36")))
+    if state.get("failures", 0) >= max_failures or now - datetime.fromisoformat(state["startedAt"]) > max_age:
+        logging.warning(
+            "Abandoning news job run=%s at stage=%s after %s failures (started %s)",
+            state.get("runId"),
+            state.get("stage"),
+            state.get("failures", 0),
+            state.get("startedAt"),
+        )
+        return False
+    return True
+
+
+def _load_or_start_state() -> dict[str, Any] | None:
+    """Resume or start a run and take the lease on the state document.
+
+    Returns None when another invocation holds an unexpired lease.
+    """
+    now = datetime.now(timezone.utc)
+    stored = safe_read_item(_system_container(), JOB_STATE_ID, JOB_STATE_TYPE)
+    if stored and stored.get("leaseUntil") and datetime.fromisoformat(stored["leaseUntil"]) > now:
+        logging.info("News job run=%s is held by another invocation until %s", stored.get("runId"), stored["leaseUntil"])
+        return None
+    if _resumable(stored, now):
+        logging.info("Resuming news job run=%s at stage=%s", stored.get("runId"), stored.get("stage"))
+        state = {key: value for key, value in stored.items() if not key.startswith("_")}
+        # Still "running" with an expired lease: the last invocation never
+        # returned, so any generate messages it built were not enqueued.
+        state["requeuePending"] = stored.get("status") == "running"
+        state["status"] = "running"
+    else:
+        state = _new_state(now.isoformat())
+        logging.info("Starting news job run=%s", state["runId"])
+    state["leaseUntil"] = (now + timedelta(seconds=_lease_seconds())).isoformat()
+    errors = cosmos_errors()
+    try:
+        if stored is None:
+            saved = create_item(_system_container(), state, partition_key=JOB_STATE_TYPE)
+        else:
+            saved = replace_item(_system_container(), JOB_STATE_ID, state, JOB_STATE_TYPE, etag=stored.get("_etag"))
+    except (errors.CosmosAccessConditionFailedError, errors.CosmosResourceExistsError):
+        logging.info("Another invocation took the news job lease first")
+        return None
+    state["_etag"] = saved.get("_etag")
+    return state
+
+
+def _fetch_company_results(
+    companies: list[str],
+    watermarks: dict[str, dict],
+) -> tuple[dict[str, list[dict]], dict[str, list[dict]]]:
+    """Search each company from its watermark and drop URLs it has already seen.
+
+    Returns the unseen results and the raw results (used to advance the watermarks).
+    """
+    company_results: dict[str, list[dict]] = {}
+    raw_results: dict[str, list[dict]] = {}
+    for company in companies:
+        watermark = watermarks.get(company)
+        try:
+            results = search_company_news(company, max_results=3, start_date=start_date_for(watermark))
+        except Exception:
+            logging.exception("Tavily search failed for %s", company)
+            continue
+        unseen = filter_unseen(results, watermark)
+        logging.info("Tavily results for %s: %s (%s unseen)", company, len(results), len(unseen))
+        raw_results[company] = results
+        company_results[company] = unseen
+    return company_results, raw_results
+
+
+def _stage_fetch(state: dict[str, Any], subscribers: dict[str, list[str]]) -> None:
+    # One Tavily call per distinct company, regardless of subscriber count,
+    # covering only the window since that company's watermark.
+    company_results, raw_results = _fetch_company_results(sorted(subscribers), read_watermarks(subscribers))
+    state.update(companyResults=company_results, rawResults=raw_results, stage="dedup")
+
+
+def _stage_dedup(state: dict[str, Any]) -> None:
+    # Resolve each result to its canonical article with one bulk read;
+    # only unseen articles need generation.
+    articles_container = _articles_container()
+    now = state["lastRunAt"]
+    candidates: dict[str, list[tuple[str, dict]]] = {}
+    for company, results in state["companyResults"].items():
+        for result in results:
+            title = result.get("title", "")
+            content = result.get("content", "")
+            url = result.get("url", "")
+            if not (title or content):
+                continue
+            candidates.setdefault(company, []).append((_article_id(url, title, content), result))
+    existing_articles = read_items_by_ids(
+        articles_container,
+        [article_id for pairs in candidates.values() for article_id, _ in pairs],
+        fields=_REFERENCE_FIELDS,
+    )
+
+    # A result under a new URL that canonicalises to, or reads like, a recent
+    # article is merged into that article instead of being generated again.
+    fingerprints = _load_fingerprint_index()
+    company_articles: dict[str, list[dict]] = {}
+    new_articles: dict[str, dict] = {}
+    duplicates = 0
+    for company, pairs in candidates.items():
+        for article_id, result in pairs:
+            article = existing_articles.get(article_id) or new_articles.get(article_id)
+            if article:
+                logging.info("Reuse existing article id=%s title=%s", article_id, article.get("title"))
+            else:
+                canonical_url, simhash = fingerprint(result)
+                article = fingerprints.find(canonical_url, simhash)
+                if article:
+                    duplicates += 1
+                    logging.info("Merge near-duplicate %s into article id=%s", result.get("url"), article["id"])
+                else:
+                    article = _build_article(article_id, company, result, now)
+                    article.update({"canonicalUrl": canonical_url, "simhash": simhash})
+                    new_articles[article_id] = article
+                    fingerprints.add(article)
+            company_articles.setdefault(company, []).append(
+                {field: article.get(field) for field in ["id", *_REFERENCE_FIELDS]}
+            )
+    unseen = len(new_articles) + duplicates
+    rate = round(duplicates / unseen, 4) if unseen else 0.0
+    logging.info("Dedup merged %s of %s unseen results (rate=%.2f)", duplicates, unseen, rate)
+    recorder.set_value("dedupMerged", duplicates)
+    recorder.set_value("dedupRate", rate)
+    state.update(
+        companyArticles=company_articles,
+        pendingArticles=list(new_articles.values()),
+        skippedDuplicates=duplicates,
+        dedupRate=rate,
+        stage="generate",
+    )
+    state.pop("companyResults", None)
+
+
+def _article_levels(articles: list[dict], subscribers: dict[str, list[str]]) -> dict[str, list[str]] | None:
+    """In lazy mode, the CEFR levels to generate per article: those its company's subscribers read."""
+    if level_generation_mode() != "lazy":
+        return None
+    company_levels = subscriber_levels(subscribers)
+    return {article["id"]: sorted(company_levels.get(article.get("company", ""), ())) for article in articles}
+
+
+def _apply_generated(article: dict[str, Any], summary: str, level_contents: dict[str, str], lazy: bool) -> None:
+    if lazy:
+        # Other levels are generated on first request from the original text.
+        article.setdefault("sourceContent", article["content"])
+    article["content"] = summary
+    article.update(level_contents)
+
+
+def _require_saved(saved: int, expected: int, what: str) -> None:
+    # upsert_items logs failed partitions and carries on; a stage must not
+    # complete (and let the watermarks advance) past items it did not write.
+    if saved < expected:
+        raise RuntimeError(f"Saved {saved} of {expected} {what}")
+
+
+def _generate_messages(
+    run_id: str, articles: list[dict[str, Any]], levels: dict[str, list[str]] | None
+) -> list[dict[str, Any]]:
+    return [
+        {
+            "kind": "generate",
+            "runId": run_id,
+            "article": article,
+            "levels": levels.get(article["id"]) if levels is not None else None,
+        }
+        for article in articles
+    ]
+
+
+def _requeue_pending(
+    state: dict[str, Any], subscribers: dict[str, list[str]], exclude: set[str] | None = None
+) -> list[dict[str, Any]]:
+    """``generate`` messages for queued articles that are still pending.
+
+    Messages only reach the queue when the invocation that built them
+    returns, so a host stopped mid-run loses them and the articles would
+    keep the raw snippet as their summary. Generation is idempotent, so
+    re-sending one that is merely slow costs a repeat of cached calls.
+    """
+    stale = [
+        {key: value for key, value in article.items() if not key.startswith("_")}
+        for article in query_items(
+            _articles_container(),
+            "SELECT * FROM c WHERE c.generationStatus = @status",
+            parameters=[{"name": "@status", "value": "pending"}],
+        )
+        if article["id"] not in (exclude or set())
+    ]
+    if stale:
+        logging.warning("Re-queueing %s articles still pending generation", len(stale))
+    return _generate_messages(state["runId"], stale, _article_levels(stale, subscribers))
+
+
+def _stage_generate(
+    state: dict[str, Any],
+    deadline: Deadline,
+    mode: str,
+    subscribers: dict[str, list[str]],
+) -> list[dict[str, Any]]:
+    """Generate pending articles in checkpointed batches, or hand them to queue workers."""
+    articles_container = _articles_container()
+    pending: list[dict] = state.get("pendingArticles") or []
+    levels = _article_levels(pending, subscribers)
+    messages: list[dict[str, Any]] = []
+    if mode == "queue":
+        # Store the source text now so references never dangle; workers replace it.
+        for article in pending:
+            article["generationStatus"] = "pending"
+        _require_saved(upsert_items(articles_container, pending), len(pending), "pending articles")
+        _require_saved(save_day_copies(pending), len(pending), "pending article listings")
+        messages = [
+            *_generate_messages(state["runId"], pending, levels),
+            *_requeue_pending(state, subscribers, exclude={article["id"] for article in pending}),
+        ]
+        state.update(pendingArticles=[], stage="persist")
+        return messages
+
+    deployment = os.environ.get("AZURE_OPENAI_DEPLOYMENT", "")
+    batch_size = max(1, int(os.environ.get("NEWS_JOB_GENERATION_BATCH", "8")))
+    while pending:
+        if deadline.expired():
+            return messages
+        # Copies, so a failed write leaves the checkpointed articles ungenerated.
+        batch, pending = [dict(article) for article in pending[:batch_size]], pending[batch_size:]
+        generated = generate_texts(
+            deployment,
+            {article["id"]: article["content"] for article in batch},
+            levels=levels,
+        )
+        for article in batch:
+            summary, level_contents = generated[article["id"]]
+            _apply_generated(article, summary, level_contents, lazy=levels is not None)
+        saved = upsert_items(articles_container, batch)
+        logging.info("Saved %s of %s new articles", saved, len(batch))
+        _require_saved(saved, len(batch), "new articles")
+        _require_saved(save_day_copies(batch), len(batch), "new article listings")
+        state["pendingArticles"] = pending
+        _save_state(state)
+    logging.info("AOAI response cache stats: %s", get_cache_stats())
+    logging.info("AOAI limiter stats: %s", get_limiter_stats())
+    state["stage"] = "persist"
+    return messages
+
+
+def _stage_persist(state: dict[str, Any], subscribers: dict[str, list[str]]) -> None:
+    # Build a lightweight reference for every subscribed user, skip the ones that
+    # already exist (one bulk check) and write the rest in batches.
+    container = os.environ.get("COSMOS_CONTAINER", "news_items")
+    pk_field = news_partition_key()
+    now = state["lastRunAt"]
+    references: dict[str, dict] = {}
+    for company, articles in state["companyArticles"].items():
+        for article in articles:
+            for user_id in subscribers.get(company, []):
+                reference = _build_user_reference(user_id, company, article, now)
+                reference[pk_field] = partition_key_value(pk_field, reference)
+                references[reference["id"]] = reference
+
+    # With /dayKey the check spans partitions: a reference saved on an earlier
+    # day has the same id but lives in that day's partition.
+    existing_ids = read_existing_ids(container, references, partition_key=shared_partition_value(pk_field))
+    new_references = [ref for ref_id, ref in references.items() if ref_id not in existing_ids]
+    saved = upsert_items(container, new_references, partition_key_field=pk_field)
+    logging.info("Saved %s user items, skipped %s existing", saved, len(existing_ids))
+    _require_saved(saved, len(new_references), "user items")
+    state.update(saved=saved, stage="feeds")
+
+
+def _stage_feeds(state: dict[str, Any], subscribers: dict[str, list[str]]) -> None:
+    now = state["lastRunAt"]
+    state["feeds"] = update_feeds(state["companyArticles"], subscribers, now)
+
+    # Watermarks only advance once everything fetched has been persisted.
+    save_watermarks(_advanced_watermarks(state, now))
+    bump_generation()
+    state.update(stage="done", status="success")
+    for key in ("rawResults", "companyArticles", "pendingArticles"):
+        state.pop(key, None)
+
+
+def _advanced_watermarks(state: dict[str, Any], now: str) -> list[dict[str, Any]]:
+    raw_results: dict[str, list[dict]] = state["rawResults"]
+    watermarks = read_watermarks(raw_results)
+    return [advance(watermarks.get(company), company, results, now) for company, results in raw_results.items()]
+
+
+def run_news_job(deadline: Deadline, mode: str | None = None) -> list[dict[str, Any]]:
+    """Run or resume the nightly job: collect → fetch → dedup → generate → persist → feeds.
+
+    Progress is checkpointed in the system container after every stage (and
+    every generation batch). When the time budget runs out the job stops
+    cleanly with status ``paused`` and returns a ``resume`` message; any
+    ``generate`` messages for queue workers are returned as well, also when
+    a later stage fails (the failure is recorded in the state instead of
+    raised). An invocation that finds the run leased to another one returns
+    nothing.
+    """
+    mode = mode or _generation_mode()
+    recorder.reset()
+    state = _load_or_start_state()
+    if state is None:
+        return []
+    messages: list[dict[str, Any]] = []
+    try:
+        with timed("job", "collect"):
+            subscribers = _load_subscribers()
+        if state.pop("requeuePending", False) and mode == "queue" and state["stage"] in ("persist", "feeds"):
+            messages += _requeue_pending(state, subscribers)
+        while state["stage"] != "done":
+            if deadline.expired():
+                state["status"] = "paused"
+                _save_state(state, release=True)
+                logging.info("News job run=%s paused at stage=%s", state["runId"], state["stage"])
+                return [*messages, {"kind": "resume", "runId": state["runId"]}]
+            stage = state["stage"]
+            with timed("job", stage):
+                if stage == "fetch":
+                    _stage_fetch(state, subscribers)
+                elif stage == "dedup":
+                    _stage_dedup(state)
+                elif stage == "generate":
+                    messages += _stage_generate(state, deadline, mode, subscribers)
+                elif stage == "persist":
+                    _stage_persist(state, subscribers)
+                elif stage == "feeds":
+                    _stage_feeds(state, subscribers)
+                else:
+                    raise ValueError(f"Unknown news job stage: {stage}")
+                _save_state(state, release=state["stage"] == "done")
+    except Exception as exc:
+        logging.exception("News job run=%s failed at stage=%s", state.get("runId"), state.get("stage"))
+        state.update(status="failed", error=str(exc), failures=state.get("failures", 0) + 1)
+        _save_state(state, release=True)
+        if not messages:
+            raise
+        # Raising would discard the output binding, and with it the generate
+        # messages for articles already stored as pending.
+        return messages
+    finally:
+        emit_summary(
+            "job",
+            "news_update",
+            related_ids={"runId": state.get("runId")},
+            status=state.get("status"),
+            stage=state.get("stage"),
+            # From the state, so a run that deduplicated in an earlier invocation still reports them.
+            merged=state.get("skippedDuplicates", 0),
+            dedupRate=state.get("dedupRate"),
+        )
+    logging.info("News job run=%s finished: saved=%s", state["runId"], state.get("saved"))
+    return messages
+
+
+def _generate_article(article: dict[str, Any], levels: list[str] | None = None) -> None:
+    deployment = os.environ.get("AZURE_OPENAI_DEPLOYMENT", "")
+    generated = generate_texts(
+        deployment,
+        {article["id"]: article["content"]},
+        levels={article["id"]: levels} if levels is not None else None,
+    )
+    summary, level_contents = generated[article["id"]]
+    _apply_generated(article, summary, level_contents, lazy=levels is not None)
+    article.pop("generationStatus", None)
+    upsert_item(_articles_container(), article, partition_key=article["id"])
+    _require_saved(save_day_copies([article]), 1, "article listings")
+    refresh_feed_items(article)
+    bump_generation()
+
+
+def handle_job_message(message: dict[str, Any], deadline: Deadline) -> list[dict[str, Any]]:
+    """Process one queue message and return any follow-up messages to enqueue."""
+    kind = message.get("kind")
+    if kind == "generate":
+        _generate_article(message["article"], message.get("levels"))
+        return []
+    if kind == "resume":
+        return run_news_job(deadline)
+    logging.warning("Ignoring unknown news job message kind=%s", kind)
+    return []
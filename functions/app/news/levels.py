@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any
+
+from app.aoai.service import CEFR_LEVELS, generate_level_text_async
+from app.cosmos import async_repository
+from app.cosmos.repository import read_items_by_ids
+from app.news.article_days import patch_day_copy_async
+
+# Level the app shows when a user has not chosen one (native settingsSlice).
+DEFAULT_LEVEL = "B1"
+
+# Handlers run on the worker's single event loop, so no lock is needed.
+_INFLIGHT: dict[tuple[str, str], asyncio.Future] = {}
+
+
+class LevelGenerationError(RuntimeError):
+    """Raised when an on-demand CEFR rewrite could not be generated."""
+
+
+def _articles_container() -> str:
+    return os.environ.get("COSMOS_ARTICLES_CONTAINER", "articles")
+
+
+def generation_mode() -> str:
+    mode = os.environ.get("NEWS_LEVEL_GENERATION", "eager").strip().lower()
+    return mode if mode in ("eager", "lazy") else "eager"
+
+
+def user_level(user: dict[str, Any] | None) -> str:
+    """The user's CEFR level, or DEFAULT_LEVEL when unset or invalid."""
+    level = str((user or {}).get("level") or DEFAULT_LEVEL).upper()
+    return level if level in CEFR_LEVELS else DEFAULT_LEVEL
+
+
+def subscriber_levels(subscribers: dict[str, list[str]]) -> dict[str, set[str]]:
+    """Return company -> CEFR levels chosen by its current subscribers."""
+    users_container = os.environ.get("COSMOS_USERS_CONTAINER", "users")
+    user_ids = {user_id for ids in subscribers.values() for user_id in ids}
+    users = read_items_by_ids(users_container, user_ids, fields=["level"])
+    levels: dict[str, set[str]] = {}
+    for company, ids in subscribers.items():
+        for user_id in ids:
+            levels.setdefault(company, set()).add(user_level(users.get(user_id)))
+    return levels
+
+
+async def _generate_and_store(article: dict[str, Any], level: str) -> tuple[str, str]:
+    deployment = os.environ.get("AZURE_OPENAI_DEPLOYMENT", "")
+    # Articles written in lazy mode keep the Tavily text; older ones only have the summary.
+    source = article.get("sourceContent") or article.get("content") or article.get("title", "")
+    try:
+        text = await generate_level_text_async(deployment, source, level)
+    except Exception as exc:
+        raise LevelGenerationError(f"CEFR {level} generation failed for {article['id']}") from exc
+
+    generated_at = datetime.now(timezone.utc).isoformat()
+    operations = [
+        {"op": "set", "path": f"/content_{level.lower()}", "value": text},
+        {"op": "set", "path": f"/generatedAt_{level.lower()}", "value": generated_at},
+    ]
+    try:
+        await async_repository.patch_item(_articles_container(), article["id"], article["id"], operations)
+    except Exception:
+        # The reader still gets the text; the next request regenerates (usually from the AOAI cache).
+        logging.exception("Failed to store CEFR %s text for article %s", level, article["id"])
+        return text, generated_at
+    await patch_day_copy_async(article, operations)
+    return text, generated_at
+
+
+async def get_level_text(article_id: str, level: str) -> dict[str, Any] | None:
+    """Return the article's text for ``level``, generating and storing it on first request.
+
+    Concurrent requests for the same (article, level) in this instance share
+    one generation. Returns None when the article does not exist.
+    """
+    article = await async_repository.safe_read_item(_articles_container(), article_id, article_id)
+    if article is None:
+        return None
+    field = level.lower()
+    if article.get(f"content_{field}"):
+        created_at = article.get(f"generatedAt_{field}") or article.get("fetchedAt")
+        return {"text": article[f"content_{field}"], "hit": True, "createdAt": created_at, "updatedAt": created_at}
+
+    key = (article_id, level)
+    future = _INFLIGHT.get(key)
+    if future is None:
+        future = _INFLIGHT[key] = asyncio.ensure_future(_generate_and_store(article, level))
+        future.add_done_callback(lambda _: _INFLIGHT.pop(key, None))
+    # Shielded so a client that disconnects does not cancel the generation others wait on.
+    text, generated_at = await asyncio.shield(future)
+    return {"text": text, "hit": False, "createdAt": generated_at, "updatedAt": generated_at}
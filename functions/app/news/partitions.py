@@ -0,0 +1,71 @@
+"""Partitioning of the per-user news container (``COSMOS_CONTAINER``).
+
+``COSMOS_PARTITION_KEY`` selects the layout:
+
+- ``/dayKey``: one logical partition per JST day (``YYYY-MM-DD``) of
+  ``fetchedAt``. A run's references land in one partition, and range
+  queries name only the days they cover.
+- ``/id``: one partition per item (the default). Writes spread evenly,
+  but every list query fans out to all physical partitions.
+- any other path: every item carries the constant ``COSMOS_PARTITION_VALUE``.
+  This is the legacy layout, a single hot partition capped at 20 GB.
+  Move off it with ``tools/migrate_news_partitions.py``.
+"""
+from __future__ import annotations
+
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Any
+
+DAY_KEY_FIELD = "dayKey"
+JST = timezone(timedelta(hours=9))
+
+
+def normalize_partition_key(pk_field: str) -> str:
+    return pk_field.lstrip("/").strip()
+
+
+def news_partition_key() -> str:
+    return normalize_partition_key(os.environ.get("COSMOS_PARTITION_KEY", "id"))
+
+
+def day_key(timestamp: str | datetime) -> str:
+    """JST calendar day of an ISO timestamp; naive timestamps are taken as UTC."""
+    moment = datetime.fromisoformat(timestamp) if isinstance(timestamp, str) else timestamp
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(JST).date().isoformat()
+
+
+def day_keys_between(since: str, until: str) -> list[str]:
+    """Every day key from ``since`` to ``until`` inclusive, newest first."""
+    first, last = date.fromisoformat(day_key(since)), date.fromisoformat(day_key(until))
+    return [(last - timedelta(days=offset)).isoformat() for offset in range((last - first).days + 1)]
+
+
+def partition_key_value(pk_field: str, item: dict[str, Any]) -> str:
+    if pk_field == "id":
+        return item["id"]
+    if pk_field == DAY_KEY_FIELD:
+        return item[DAY_KEY_FIELD]
+    return os.environ.get("COSMOS_PARTITION_VALUE", "items")
+
+
+def shared_partition_value(pk_field: str) -> str | None:
+    """The single partition every item lives in, for the legacy layout only."""
+    if pk_field in ("id", DAY_KEY_FIELD):
+        return None
+    return os.environ.get("COSMOS_PARTITION_VALUE", "items")
+
+
+def day_key_condition(since: str, until: str, parameters: list[dict[str, Any]]) -> str:
+    """``c.dayKey IN (...)`` for the days in range, appending its parameters.
+
+    An ``IN`` list on the partition key lets the query plan route to those
+    partitions only, where ``ARRAY_CONTAINS`` would still fan out.
+    """
+    names = []
+    for index, key in enumerate(day_keys_between(since, until)):
+        names.append(f"@dayKey{index}")
+        parameters.append({"name": names[-1], "value": key})
+    return f"c.{DAY_KEY_FIELD} IN ({', '.join(names)})"
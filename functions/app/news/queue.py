@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import json
+import logging
+from collections import deque
+from typing import Any, Callable, Iterable
+
+
+class InMemoryJobQueue:
+    """Local stand-in for the ``news-jobs`` storage queue.
+
+    Messages round-trip through JSON like they do on the real queue, so a
+    handler that works here sees the same payloads in Azure.
+    """
+
+    def __init__(self) -> None:
+        self._messages: deque[str] = deque()
+        self.processed = 0
+        self.failed = 0
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def send(self, messages: Iterable[dict[str, Any]]) -> None:
+        for message in messages:
+            self._messages.append(json.dumps(message))
+
+    def run_until_empty(
+        self,
+        handler: Callable[[dict[str, Any]], Iterable[dict[str, Any]]],
+        max_messages: int = 1000,
+    ) -> int:
+        """Deliver messages to ``handler`` and enqueue whatever it returns."""
+        delivered = 0
+        while self._messages and delivered < max_messages:
+            message = json.loads(self._messages.popleft())
+            delivered += 1
+            try:
+                self.send(handler(message) or [])
+            except Exception:
+                logging.exception("Job message failed: kind=%s", message.get("kind"))
+                self.failed += 1
+                continue
+            self.processed += 1
+        return delivered
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta
+from typing import Any, Iterable
+
+from app.cosmos.repository import read_items_by_ids, upsert_items
+
+_TYPE = "tavily_watermark"
+_MAX_SEEN_URLS = 200
+# Re-request one day before the last fetch: Tavily filters on whole dates and
+# published dates lag, and the seen-URL set drops the overlap again.
+_OVERLAP_DAYS = 1
+
+
+def _system_container() -> str:
+    return os.environ.get("COSMOS_SYSTEM_CONTAINER", "system")
+
+
+def _watermark_id(company: str) -> str:
+    return f"{_TYPE}_{company}"
+
+
+def read_watermarks(companies: Iterable[str]) -> dict[str, dict[str, Any]]:
+    docs = read_items_by_ids(
+        _system_container(),
+        [_watermark_id(company) for company in companies],
+        partition_key=_TYPE,
+    )
+    return {doc["company"]: doc for doc in docs.values() if doc.get("company")}
+
+
+def start_date_for(watermark: dict[str, Any] | None) -> str | None:
+    if not watermark or not watermark.get("lastFetchedAt"):
+        return None
+    last_fetched = datetime.fromisoformat(watermark["lastFetchedAt"])
+    return (last_fetched - timedelta(days=_OVERLAP_DAYS)).date().isoformat()
+
+
+def filter_unseen(results: list[dict[str, Any]], watermark: dict[str, Any] | None) -> list[dict[str, Any]]:
+    seen = set((watermark or {}).get("seenUrls") or [])
+    return [result for result in results if not result.get("url") or result["url"] not in seen]
+
+
+def advance(
+    watermark: dict[str, Any] | None,
+    company: str,
+    results: list[dict[str, Any]],
+    now: str,
+) -> dict[str, Any]:
+    seen = [result["url"] for result in results if result.get("url")]
+    seen += [url for url in (watermark or {}).get("seenUrls") or [] if url not in seen]
+    published = [
+        result.get("published_date") or result.get("published_at")
+        for result in results
+        if result.get("published_date") or result.get("published_at")
+    ]
+    last_published = max([*published, (watermark or {}).get("lastPublishedAt") or ""]) or None
+    return {
+        "id": _watermark_id(company),
+        "type": _TYPE,
+        "company": company,
+        "lastFetchedAt": now,
+        "lastPublishedAt": last_published,
+        "seenUrls": seen[:_MAX_SEEN_URLS],
+        "updatedAt": now,
+    }
+
+
+def save_watermarks(watermarks: list[dict[str, Any]]) -> int:
+    return upsert_items(_system_container(), watermarks, partition_key_field="type")
@@ -1,9 +1,17 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import os
-from typing import Any, Optional
+import tempfile
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Optional
 
-import requests # type: ignore
+from app.telemetry.metrics import timed
+
+if TYPE_CHECKING:
+    import requests # type: ignore
 
 
 def _require_env(key: str) -> str:
@@ -13,10 +21,65 @@ def _require_env(key: str) -> str:
     return value
 
 
+@lru_cache(maxsize=1)
+def _get_session() -> requests.Session:
+    # Imported here so loading the module (the job imports it) does not load requests.
+    import requests # type: ignore
+    from requests.adapters import HTTPAdapter # type: ignore
+
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+    session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+    return session
+
+
 class TavilyClient:
-    def __init__(self, api_key: Optional[str] = None, base_url: str | None = None) -> None:
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: str | None = None,
+        cache_dir: str | None = None,
+        cache_ttl_seconds: int | None = None,
+    ) -> None:
         self._api_key = api_key or _require_env("TAVILY_API_KEY")
         self._base_url = (base_url or os.environ.get("TAVILY_BASE_URL", "https://api.tavily.com")).rstrip("/")
+        self._cache_dir = cache_dir or os.environ.get(
+            "TAVILY_CACHE_DIR", os.path.join(tempfile.gettempdir(), "tavily_cache")
+        )
+        if cache_ttl_seconds is None:
+            cache_ttl_seconds = int(os.environ.get("TAVILY_CACHE_TTL_SECONDS", str(6 * 3600)))
+        self._cache_ttl_seconds = cache_ttl_seconds
+
+    def _cache_path(self, payload: dict[str, Any]) -> str:
+        # The api_key is left out so the cache key never depends on (or stores) the secret.
+        key_source = {key: value for key, value in payload.items() if key != "api_key"}
+        key_source["base_url"] = self._base_url
+        digest = hashlib.sha256(json.dumps(key_source, sort_keys=True).encode("utf-8")).hexdigest()
+        return os.path.join(self._cache_dir, f"{digest}.json")
+
+    def _read_cache(self, path: str) -> dict[str, Any] | None:
+        if self._cache_ttl_seconds <= 0:
+            return None
+        try:
+            with open(path, encoding="utf-8") as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if entry.get("expires_at", 0) < time.time():
+            return None
+        return entry.get("response")
+
+    def _write_cache(self, path: str, response: dict[str, Any]) -> None:
+        if self._cache_ttl_seconds <= 0:
+            return
+        try:
+            os.makedirs(self._cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump({"expires_at": time.time() + self._cache_ttl_seconds, "response": response}, file)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
 
     def search(
         self,
@@ -26,6 +89,7 @@ class TavilyClient:
         include_answer: bool = False,
         include_domains: Optional[list[str]] = None,
         time_range: Optional[str] = None,
+        start_date: Optional[str] = None,
     ) -> dict[str, Any]:
         payload: dict[str, Any] = {
             "api_key": self._api_key,
@@ -38,7 +102,17 @@ class TavilyClient:
             payload["include_domains"] = include_domains
         if time_range:
             payload["time_range"] = time_range
+        if start_date:
+            payload["start_date"] = start_date
+
+        cache_path = self._cache_path(payload)
+        cached = self._read_cache(cache_path)
+        if cached is not None:
+            return cached
 
-        response = requests.post(f"{self._base_url}/search", json=payload, timeout=30)
-        response.raise_for_status()
-        return response.json()
+        with timed("tavily", "search"):
+            response = _get_session().post(f"{self._base_url}/search", json=payload, timeout=30)
+            response.raise_for_status()
+        data = response.json()
+        self._write_cache(cache_path, data)
+        return data
@@ -57,7 +57,12 @@ def search_ai_news(query: str = "AI news", max_results: int = 5) -> list[dict[st
     return data.get("results", [])
 
 
-def search_company_news(company: str, max_results: int = 3) -> list[dict[str, Any]]:
+def search_company_news(
+    company: str,
+    max_results: int = 3,
+    start_date: str | None = None,
+) -> list[dict[str, Any]]:
+    """Search a company's news, from ``start_date`` (YYYY-MM-DD) when given, else the last month."""
     config = _COMPANY_CONFIG.get(company)
     if not config:
         return []
@@ -68,6 +73,7 @@ def search_company_news(company: str, max_results: int = 3) -> list[dict[str, An
         search_depth="advanced",
         include_answer=False,
         include_domains=config["domains"],
-        time_range="month",
+        time_range=None if start_date else "month",
+        start_date=start_date,
     )
     return data.get("results", [])
@@ -0,0 +1 @@
+"""Run metrics and structured logging."""
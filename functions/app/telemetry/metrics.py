@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Iterator, Mapping
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open.
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+_BUCKET_LABELS = [f"le{bound}" for bound in BUCKETS_MS] + ["inf"]
+
+
+def _enabled_from_env() -> bool:
+    return os.environ.get("TELEMETRY_ENABLED", "true").strip().lower() not in ("0", "false", "off", "no")
+
+
+# Read once at import; callers check this flag before doing any work, so
+# turning telemetry off costs one attribute lookup per call.
+ENABLED = _enabled_from_env()
+
+
+class Sample:
+    """Values attached to one timed operation."""
+
+    __slots__ = ("ru", "prompt_tokens", "completion_tokens", "error")
+
+    def __init__(self) -> None:
+        self.ru = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.error = False
+
+    def add_charge(self, headers: Mapping[str, str], *_: Any) -> None:
+        """Cosmos ``response_hook``: add the ``x-ms-request-charge`` of each response."""
+        try:
+            self.ru += float(headers.get("x-ms-request-charge") or 0)
+        except (TypeError, ValueError):
+            pass
+
+    def add_usage(self, usage: Any) -> None:
+        if usage is not None:
+            self.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+            self.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+
+
+class _Stat:
+    __slots__ = ("count", "errors", "total_ms", "max_ms", "buckets", "ru", "prompt_tokens", "completion_tokens")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.ru = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def add(self, latency_ms: float, sample: Sample) -> None:
+        self.count += 1
+        self.errors += sample.error
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+        self.buckets[bisect.bisect_left(BUCKETS_MS, latency_ms)] += 1
+        self.ru += sample.ru
+        self.prompt_tokens += sample.prompt_tokens
+        self.completion_tokens += sample.completion_tokens
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th sample (``max`` for the open bucket)."""
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= rank:
+                return float(BUCKETS_MS[index]) if index < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> dict[str, Any]:
+        summary: dict[str, Any] = {
+            "count": self.count,
+            "errors": self.errors,
+            "totalMs": round(self.total_ms, 1),
+            "p50Ms": self.percentile(0.5),
+            "p99Ms": self.percentile(0.99),
+            "maxMs": round(self.max_ms, 1),
+            "histogram": {label: count for label, count in zip(_BUCKET_LABELS, self.buckets) if count},
+        }
+        if self.ru:
+            summary["requestCharge"] = round(self.ru, 2)
+        if self.prompt_tokens or self.completion_tokens:
+            summary["promptTokens"] = self.prompt_tokens
+            summary["completionTokens"] = self.completion_tokens
+        return summary
+
+
+class Recorder:
+    """Per-run aggregation of ``(source, operation)`` latencies, RU and tokens, plus named values."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats: dict[tuple[str, str], _Stat] = {}
+        self._values: dict[str, float] = {}
+        self._started = time.monotonic()
+
+    def observe(self, source: str, operation: str, latency_ms: float, sample: Sample) -> None:
+        with self._lock:
+            stat = self._stats.get((source, operation))
+            if stat is None:
+                stat = self._stats[(source, operation)] = _Stat()
+            stat.add(latency_ms, sample)
+
+    def set_value(self, name: str, value: float) -> None:
+        """Record a run-level figure (a count or rate) reported under ``values``."""
+        with self._lock:
+            self._values[name] = value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._values.clear()
+            self._started = time.monotonic()
+
+    def summary(self) -> dict[str, Any]:
+        with self._lock:
+            stats = sorted(self._stats.items())
+            values = dict(sorted(self._values.items()))
+            elapsed = time.monotonic() - self._started
+        by_source: dict[str, dict[str, Any]] = {}
+        for (source, operation), stat in stats:
+            by_source.setdefault(source, {})[operation] = stat.to_dict()
+        totals = {
+            source: {
+                "count": sum(op["count"] for op in operations.values()),
+                "errors": sum(op["errors"] for op in operations.values()),
+                "totalMs": round(sum(op["totalMs"] for op in operations.values()), 1),
+                "requestCharge": round(sum(op.get("requestCharge", 0) for op in operations.values()), 2),
+                "promptTokens": sum(op.get("promptTokens", 0) for op in operations.values()),
+                "completionTokens": sum(op.get("completionTokens", 0) for op in operations.values()),
+            }
+            for source, operations in by_source.items()
+        }
+        return {"elapsedMs": round(elapsed * 1000, 1), "totals": totals, "operations": by_source, "values": values}
+
+
+recorder = Recorder()
+
+
+class _NoopSample(Sample):
+    def add_charge(self, headers: Mapping[str, str], *_: Any) -> None:
+        return
+
+    def add_usage(self, usage: Any) -> None:
+        return
+
+
+_NOOP = _NoopSample()
+
+
+@contextmanager
+def timed(source: str, operation: str) -> Iterator[Sample]:
+    """Time the block and record it under ``(source, operation)``; errors are counted and re-raised."""
+    if not ENABLED:
+        yield _NOOP
+        return
+    sample = Sample()
+    started = time.perf_counter()
+    try:
+        yield sample
+    except BaseException:
+        sample.error = True
+        raise
+    finally:
+        recorder.observe(source, operation, (time.perf_counter() - started) * 1000, sample)
+
+
+def charge_hook(sample: Sample) -> dict[str, Any]:
+    """Keyword arguments that route a Cosmos call's RU charge into ``sample``."""
+    return {"response_hook": sample.add_charge} if ENABLED else {}
+
+
+def log_event(
+    level: int,
+    component: str,
+    action: str,
+    related_ids: dict[str, Any] | None = None,
+    error_code: str | None = None,
+    error_message: str | None = None,
+    **fields: Any,
+) -> None:
+    """Log one JSON line with the fields required by native/runbook.md (section 2.1)."""
+    record: dict[str, Any] = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "environment": os.environ.get("APP_ENVIRONMENT", "dev"),
+        "component": component,
+        "action": action,
+    }
+    if error_code or error_message:
+        record.update(error_code=error_code, error_message=error_message)
+    if related_ids:
+        record["related_ids"] = related_ids
+    record.update(fields)
+    logging.log(level, json.dumps(record, ensure_ascii=False, default=str))
+
+
+def emit_summary(
+    component: str,
+    action: str,
+    related_ids: dict[str, Any] | None = None,
+    reset: bool = True,
+    **fields: Any,
+) -> None:
+    """Log the aggregated metrics since the last reset as one structured line."""
+    if not ENABLED:
+        return
+    log_event(logging.INFO, component, action, related_ids=related_ids, metrics=recorder.summary(), **fields)
+    if reset:
+        recorder.reset()
@@ -0,0 +1 @@
+"""Local benchmarks. Run from the functions directory, e.g. ``python -m benchmarks.bench_aoai_client``."""
@@ -0,0 +1,68 @@
+"""Per-call latency of a fresh AzureOpenAI client versus the pooled client.
+
+Runs against a local chat-completions stub, so the numbers isolate client
+construction and connection setup from model latency. Against the real
+endpoint the pooled client additionally skips a TLS handshake per call.
+The response cache is disabled so every pooled call reaches the stub, and
+both sides send the same messages.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import time
+
+from openai import AzureOpenAI  # type: ignore
+
+from app.aoai import client as aoai_client
+from app.aoai.service import chat_once
+from benchmarks.stub_servers import ChatStubHandler, StubServer
+
+_SYSTEM_PROMPT = "You are a helpful assistant."
+
+
+def _fresh_chat_once(deployment: str, message: str) -> str:
+    endpoint, api_key, api_version = aoai_client._get_settings()
+    client = AzureOpenAI(azure_endpoint=endpoint, api_key=api_key, api_version=api_version)
+    response = client.chat.completions.create(
+        model=deployment,
+        messages=[
+            {"role": "system", "content": _SYSTEM_PROMPT},
+            {"role": "user", "content": message},
+        ],
+    )
+    return response.choices[0].message.content or ""
+
+
+def _measure(label: str, call, iterations: int) -> None:
+    call()  # warm up imports and, for the pooled client, the connection
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(
+        f"{label:<8} mean={statistics.mean(samples):7.3f}ms "
+        f"p50={statistics.median(samples):7.3f}ms p99={p99:7.3f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    with StubServer(ChatStubHandler) as server:
+        os.environ["AZURE_OPENAI_ENDPOINT"] = server.url
+        os.environ["AZURE_OPENAI_API_KEY"] = "stub-key"
+        os.environ["AZURE_OPENAI_CACHE_BACKEND"] = "none"
+        deployment = "stub"
+        _measure("fresh", lambda: _fresh_chat_once(deployment, "ping"), args.iterations)
+        _measure("pooled", lambda: chat_once(deployment, "ping", system_prompt=_SYSTEM_PROMPT), args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Clerk JWT verifications per second against a local JWKS stub.
+
+Compares the previous per-request ``from_jwk`` path with the parsed-key
+cache, the verified-token cache, and a burst of unknown ``kid`` values.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from typing import Callable
+
+import jwt  # type: ignore
+from cryptography.hazmat.primitives.asymmetric import rsa  # type: ignore
+from jwt import algorithms  # type: ignore
+
+from app.auth import clerk
+from benchmarks.stub_servers import JwksStubHandler, StubServer
+
+_KID = "bench-key"
+_ISSUER = "https://clerk.bench.local"
+
+
+def _make_tokens(private_key, count: int) -> list[str]:
+    now = int(time.time())
+    return [
+        jwt.encode(
+            {"sub": f"user_{index}", "iss": _ISSUER, "iat": now, "exp": now + 3600},
+            private_key,
+            algorithm="RS256",
+            headers={"kid": _KID},
+        )
+        for index in range(count)
+    ]
+
+
+def _legacy_verify(token: str, jwk: dict) -> dict:
+    public_key = algorithms.RSAAlgorithm.from_jwk(json.dumps(jwk))
+    return jwt.decode(token, public_key, algorithms=["RS256"], issuer=_ISSUER)
+
+
+def _rate(label: str, call: Callable[[int], object], iterations: int) -> None:
+    started = time.perf_counter()
+    for index in range(iterations):
+        call(index)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<22} {iterations / elapsed:10.0f} verifications/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+    jwk.update({"kid": _KID, "alg": "RS256", "use": "sig"})
+    JwksStubHandler.jwks = {"keys": [jwk]}
+    tokens = _make_tokens(private_key, args.iterations)
+
+    with StubServer(JwksStubHandler) as server:
+        os.environ["CLERK_JWKS_URL"] = f"{server.url}/.well-known/jwks.json"
+        os.environ["CLERK_ISSUER"] = _ISSUER
+        os.environ.pop("CLERK_AUDIENCE", None)
+
+        _rate("legacy (from_jwk)", lambda i: _legacy_verify(tokens[i], jwk), args.iterations)
+        _rate("parsed-key cache", lambda i: clerk.verify_clerk_jwt(tokens[i]), args.iterations)
+        _rate("verified-token cache", lambda i: clerk.verify_clerk_jwt(tokens[i]), args.iterations)
+
+        forged = [
+            jwt.encode({"sub": "x"}, private_key, algorithm="RS256", headers={"kid": f"unknown-{i}"})
+            for i in range(200)
+        ]
+        before = JwksStubHandler.requests_served
+        for token in forged:
+            try:
+                clerk.verify_clerk_jwt(token)
+            except ValueError:
+                pass
+        print(f"unknown-kid burst: {len(forged)} tokens -> {JwksStubHandler.requests_served - before} JWKS fetches")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""Offline end-to-end benchmark of the nightly job and ``GET /api/news``.
+
+Cosmos is replaced by the dict-backed fake in ``benchmarks.fake_cosmos``;
+Tavily and Azure OpenAI are local stub servers, the latter with a
+configurable latency and share of 429 responses. A synthetic dataset of
+``--users`` users and ``--items`` per-user news items is seeded first,
+then the script reports, per phase: wall time, calls per external service,
+peak traced memory and (for the HTTP phases) p50/p99 handler latency and
+requests per second. HTTP requests are issued ``--concurrency`` at a time on
+one event loop, the way the Functions worker runs async handlers, and
+``--cosmos-latency-ms`` adds a simulated round-trip to every Cosmos call.
+``--news-partition-key dayKey`` runs against the day-partitioned layout.
+
+``--json`` writes the results for CI; ``--baseline`` compares against an
+earlier ``--json`` file and exits non-zero when a metric regresses by more
+than ``--tolerance``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import inspect
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
+
+from app.news.partitions import day_key
+from benchmarks.fake_cosmos import FakeCosmos, install
+from benchmarks.stub_servers import ChatStubHandler, StubServer, TavilyStubHandler
+
+COMPANIES = ["Google", "OpenAI", "Anthropic", "MistralAI", "Microsoft", "AWS"]
+LEVELS = ["A1", "A2", "B1", "B2", "C1", "C2"]
+# Metrics where a larger value is a regression.
+_COMPARED = ("wallSeconds", "p50Ms", "p99Ms", "peakMemoryMb", "cosmosCalls", "cosmosRu", "tavilyCalls", "chatCalls")
+
+
+def _configure_env(tavily_url: str, chat_url: str, generation_mode: str, news_partition_key: str) -> None:
+    os.environ.update(
+        {
+            "COSMOS_CONTAINER": "news_items",
+            "COSMOS_ARTICLES_CONTAINER": "articles",
+            "COSMOS_USERS_CONTAINER": "users",
+            "COSMOS_PARTITION_KEY": news_partition_key,
+            "TAVILY_API_KEY": "stub-key",
+            "TAVILY_BASE_URL": tavily_url,
+            "TAVILY_CACHE_TTL_SECONDS": "0",
+            "AZURE_OPENAI_ENDPOINT": chat_url,
+            "AZURE_OPENAI_API_KEY": "stub-key",
+            "AZURE_OPENAI_DEPLOYMENT": "stub",
+            "AZURE_OPENAI_CACHE_BACKEND": "none",
+            "AZURE_OPENAI_GENERATION_MODE": generation_mode,
+            "NEWS_JOB_TIME_BUDGET_SECONDS": "3600",
+        }
+    )
+
+
+def _seed(cosmos: FakeCosmos, users: int, items: int, rng: random.Random) -> list[str]:
+    now = datetime.now(timezone.utc)
+    user_ids = [f"user_{n:06d}" for n in range(users)]
+    user_companies: dict[str, list[str]] = {}
+    user_docs = []
+    for user_id in user_ids:
+        chosen = rng.sample(COMPANIES, rng.randint(1, 3))
+        user_companies[user_id] = chosen
+        user_docs.append(
+            {
+                "id": user_id,
+                "userId": user_id,
+                "company": {name: name in chosen for name in COMPANIES},
+                "level": rng.choice(LEVELS),
+            }
+        )
+    cosmos.get_container("users").seed(user_docs)
+
+    subscribers: dict[str, list[str]] = {name: [] for name in COMPANIES}
+    for user_id, chosen in user_companies.items():
+        for name in chosen:
+            subscribers[name].append(user_id)
+    index_docs: list[dict[str, Any]] = [
+        {"id": name, "type": "subscription_index", "company": name, "subscribers": ids}
+        for name, ids in subscribers.items()
+    ]
+    index_docs.append({"id": "_index_built", "type": "subscription_index_marker"})
+    cosmos.get_container("subscriptions").seed(index_docs)
+
+    # About one shared article per 50 per-user items, spread over the last 30 days.
+    articles: dict[str, list[dict[str, Any]]] = {name: [] for name in COMPANIES}
+    for n in range(max(len(COMPANIES), items // 50)):
+        company = COMPANIES[n % len(COMPANIES)]
+        fetched_at = (now - timedelta(minutes=rng.randint(0, 30 * 24 * 60))).isoformat()
+        article = {
+            "id": f"art_{hashlib.sha256(str(n).encode()).hexdigest()}",
+            "type": "article",
+            "company": company,
+            "companyType": company.lower(),
+            "title": f"{company} seeded story {n}",
+            "url": f"https://seed.example.com/{n}",
+            "content": f"Seeded summary {n}.",
+            "date": fetched_at[:10],
+            "fetchedAt": fetched_at,
+            **{f"content_{level.lower()}": f"Seeded {level} text {n}." for level in LEVELS},
+        }
+        articles[company].append(article)
+    cosmos.get_container("articles").seed([a for group in articles.values() for a in group])
+    cosmos.get_container("article_days").seed(
+        [{**a, "dayKey": day_key(a["fetchedAt"])} for group in articles.values() for a in group]
+    )
+
+    references = []
+    for n in range(items):
+        user_id = user_ids[n % users]
+        company = rng.choice(user_companies[user_id])
+        article = rng.choice(articles[company])
+        references.append(
+            {
+                "id": hashlib.sha256(f"{user_id}:{n}".encode()).hexdigest(),
+                "userId": user_id,
+                "articleId": article["id"],
+                "company": company,
+                "companyType": company.lower(),
+                "title": article["title"],
+                "date": article["date"],
+                "fetchedAt": article["fetchedAt"],
+                "dayKey": day_key(article["fetchedAt"]),
+            }
+        )
+    cosmos.get_container("news_items").seed(references)
+    return user_ids
+
+
+class _Phase:
+    """Collects wall time, external calls and peak traced memory for one phase."""
+
+    def __init__(self, name: str, cosmos: FakeCosmos) -> None:
+        self.name = name
+        self._cosmos = cosmos
+        self.result: dict[str, Any] = {}
+
+    def __enter__(self) -> "_Phase":
+        tracemalloc.reset_peak()
+        self._baseline = (
+            self._cosmos.total_calls(),
+            self._cosmos.total_charge(),
+            TavilyStubHandler.requests_served,
+            ChatStubHandler.requests_served,
+            ChatStubHandler.throttled,
+        )
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        wall = time.perf_counter() - self._started
+        cosmos, charge, tavily, chat, throttled = self._baseline
+        self.result.update(
+            wallSeconds=round(wall, 3),
+            cosmosCalls=self._cosmos.total_calls() - cosmos,
+            cosmosRu=round(self._cosmos.total_charge() - charge, 1),
+            tavilyCalls=TavilyStubHandler.requests_served - tavily,
+            chatCalls=ChatStubHandler.requests_served - chat,
+            chatThrottled=ChatStubHandler.throttled - throttled,
+            peakMemoryMb=round(tracemalloc.get_traced_memory()[1] / 1e6, 2),
+        )
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def _drive_http(handler: Callable, params: list[dict[str, str]], phase: _Phase, concurrency: int) -> None:
+    import azure.functions as func  # type: ignore
+
+    latencies = []
+    statuses: dict[int, int] = {}
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(query: dict[str, str]) -> None:
+        request = func.HttpRequest(method="GET", url="/api/news", params=query, body=b"")
+        async with slots:
+            started = time.perf_counter()
+            response = handler(request)
+            if inspect.isawaitable(response):
+                response = await response
+            latencies.append((time.perf_counter() - started) * 1000)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    async def run() -> None:
+        await asyncio.gather(*(one(query) for query in params))
+
+    started = time.perf_counter()
+    asyncio.run(run())
+    elapsed = time.perf_counter() - started
+    phase.result.update(
+        requests=len(params),
+        statuses=statuses,
+        requestsPerSecond=round(len(params) / elapsed, 1),
+        p50Ms=round(_percentile(latencies, 0.5), 3),
+        p99Ms=round(_percentile(latencies, 0.99), 3),
+    )
+
+
+def _compare(results: dict[str, dict[str, Any]], baseline_path: str, tolerance: float) -> list[str]:
+    with open(baseline_path, encoding="utf-8") as file:
+        baseline = json.load(file)["phases"]
+    regressions = []
+    for phase, metrics in results.items():
+        for metric in _COMPARED:
+            before, after = (baseline.get(phase) or {}).get(metric), metrics.get(metric)
+            if before is None or after is None:
+                continue
+            # Small absolute values are noisy; ignore changes below one unit.
+            if after > before * (1 + tolerance) and after - before >= 1:
+                regressions.append(f"{phase}.{metric}: {before} -> {after}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=200, help="HTTP requests per phase")
+    parser.add_argument("--concurrency", type=int, default=16, help="HTTP requests in flight per phase")
+    parser.add_argument("--cosmos-latency-ms", type=float, default=0.0, help="simulated Cosmos round-trip")
+    parser.add_argument("--chat-latency-ms", type=float, default=20.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.05, help="share of chat calls answered with 429")
+    parser.add_argument("--generation-mode", choices=["per_level", "combined"], default="per_level")
+    parser.add_argument("--news-partition-key", choices=["id", "dayKey"], default="id")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="write results to this path")
+    parser.add_argument("--baseline", help="compare against an earlier --json file")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    ChatStubHandler.latency_s = args.chat_latency_ms / 1000
+    ChatStubHandler.throttle_rate = args.throttle_rate
+
+    with StubServer(TavilyStubHandler) as tavily, StubServer(ChatStubHandler) as chat:
+        _configure_env(tavily.url, chat.url, args.generation_mode, args.news_partition_key)
+        cosmos = FakeCosmos(partition_keys={"news_items": args.news_partition_key})
+        uninstall = install(cosmos)
+        try:
+            started = time.perf_counter()
+            user_ids = _seed(cosmos, args.users, args.items, rng)
+            print(f"seeded {args.users} users / {args.items} items in {time.perf_counter() - started:.1f}s")
+
+            import function_app
+            from app.news.job import Deadline, run_news_job
+
+            handler = function_app.get_news_http._function.get_user_function()
+            tracemalloc.start()
+            results: dict[str, dict[str, Any]] = {}
+
+            with _Phase("job", cosmos) as phase:
+                run_news_job(Deadline(3600))
+            results["job"] = phase.result
+            # Latency applies to the HTTP phases only; the job is measured for call counts.
+            cosmos.set_latency(args.cosmos_latency_ms / 1000)
+
+            sampled = [rng.choice(user_ids) for _ in range(args.requests)]
+            with _Phase("http_user_cold", cosmos) as phase:
+                _drive_http(handler, [{"userId": user_id, "range": "7d"} for user_id in sampled], phase, args.concurrency)
+            results["http_user_cold"] = phase.result
+
+            with _Phase("http_user_warm", cosmos) as phase:
+                _drive_http(handler, [{"userId": user_id, "range": "7d"} for user_id in sampled], phase, args.concurrency)
+            results["http_user_warm"] = phase.result
+
+            companies = [
+                {"companyType": ",".join(c.lower() for c in rng.sample(COMPANIES, 2)), "range": f"{rng.randint(1, 30)}d"}
+                for _ in range(args.requests)
+            ]
+            with _Phase("http_company", cosmos) as phase:
+                _drive_http(handler, companies, phase, args.concurrency)
+            results["http_company"] = phase.result
+            tracemalloc.stop()
+        finally:
+            uninstall()
+
+    for name, metrics in results.items():
+        print(f"{name:<16} " + " ".join(f"{key}={value}" for key, value in metrics.items()))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump({"args": vars(args), "phases": results}, file, indent=2)
+    if args.baseline:
+        regressions = _compare(results, args.baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Peak RSS and time-to-last-byte of news list responses, old path vs streaming.
+
+``legacy`` is the previous path: collect the page into a list, then
+``json.dumps(items, ensure_ascii=False)`` and encode it for the response.
+The ``stream`` variants feed items one at a time into
+``app.api.encoding.JsonBodyWriter``, uncompressed, gzip or brotli (the
+latter only when ``brotli`` is installed).
+
+Items come from an async generator that builds each one on demand, standing
+in for the Cosmos page iterator. Each measurement runs in a fresh process,
+so ``ru_maxrss`` is not inflated by earlier cases. Time-to-last-byte is the
+time to build the body plus its transfer time at ``--bandwidth-mbps``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib
+import json
+import random
+import resource
+import subprocess
+import sys
+import time
+from typing import Any, AsyncIterator
+
+_PATHS = ["legacy", "stream", "stream-gzip", "stream-br"]
+# Per-item random word order keeps gzip/brotli ratios close to real article text.
+_WORDS = (
+    "the a model release adds longer context better tool use and lower latency for enterprise customers "
+    "researchers said new benchmark results show improved reasoning on math coding tasks while cost per "
+    "token drops company announced partnership cloud region availability developers can access preview "
+    "api pricing safety evaluation open weights training data multilingual support agents vision audio"
+).split()
+
+
+def _item(n: int, body_chars: int) -> dict[str, Any]:
+    rng = random.Random(n)
+    text = " ".join(rng.choice(_WORDS) for _ in range(body_chars // 5))[:body_chars]
+    return {
+        "id": f"art_{n:08d}",
+        "title": f"Story {n}: {rng.choice(_WORDS)} {rng.choice(_WORDS)} update",
+        "url": f"https://news.example.com/{n}",
+        "date": "2025-01-01",
+        "fetchedAt": f"2025-01-01T00:{n % 60:02d}:00+00:00",
+        "company": "Google",
+        "companyType": "google",
+        "content": text[: body_chars // 4],
+        "content_b1": text,
+    }
+
+
+async def _items(count: int, body_chars: int) -> AsyncIterator[dict[str, Any]]:
+    for n in range(count):
+        yield _item(n, body_chars)
+
+
+async def _legacy(count: int, body_chars: int) -> bytes:
+    items = [item async for item in _items(count, body_chars)]
+    body = json.dumps({"range": "7d", "items": items, "cursor": None}, ensure_ascii=False)
+    return body.encode("utf-8")
+
+
+async def _stream(count: int, body_chars: int, encoding: str | None) -> bytes:
+    from app.api.encoding import JsonBodyWriter, write_list_object
+
+    writer = JsonBodyWriter(encoding)
+    await write_list_object(writer, {"range": "7d"}, "items", _items(count, body_chars), lambda: {"cursor": None})
+    return writer.finish()[0]
+
+
+def _worker(path: str, count: int, body_chars: int) -> dict[str, Any]:
+    # Imported before the baseline, as in a warm worker.
+    importlib.import_module("app.api.encoding")
+
+    encoding = {"stream-gzip": "gzip", "stream-br": "br"}.get(path)
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    if path == "legacy":
+        body = asyncio.run(_legacy(count, body_chars))
+    else:
+        body = asyncio.run(_stream(count, body_chars, encoding))
+    build_s = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+    return {"buildMs": round(build_s * 1000, 1), "bytes": len(body), "peakRssMb": round(peak_kb / 1024, 1)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--body-chars", type=int, default=2000, help="characters in the CEFR body of each item")
+    parser.add_argument("--bandwidth-mbps", type=float, default=20.0)
+    parser.add_argument("--json", help="write results to this path")
+    parser.add_argument("--worker", nargs=2, metavar=("PATH", "ITEMS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(_worker(args.worker[0], int(args.worker[1]), args.body_chars)))
+        return
+
+    from app.api.encoding import negotiate_encoding
+
+    paths = [path for path in _PATHS if path != "stream-br" or negotiate_encoding("br") == "br"]
+    results: dict[str, dict[str, Any]] = {}
+    for count in args.items:
+        for path in paths:
+            completed = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_response_encoding", "--worker", path, str(count),
+                 "--body-chars", str(args.body_chars)],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            result = json.loads(completed.stdout)
+            transfer_ms = result["bytes"] * 8 / (args.bandwidth_mbps * 1e6) * 1000
+            result["ttlbMs"] = round(result["buildMs"] + transfer_ms, 1)
+            results[f"{path}/{count}"] = result
+            print(
+                f"{count:>6} items  {path:<12} body={result['bytes'] / 1e6:7.2f} MB  "
+                f"build={result['buildMs']:8.1f} ms  ttlb={result['ttlbMs']:9.1f} ms  "
+                f"peakRss=+{result['peakRssMb']:.1f} MB"
+            )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump({"args": vars(args), "results": results}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
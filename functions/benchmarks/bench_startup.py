@@ -0,0 +1,130 @@
+"""Cold-start import cost of ``function_app``.
+
+Runs ``python -X importtime -c "import function_app"`` in fresh processes
+(after one warm-up run that writes the .pyc files, as a deployed package
+has them) and reports, from the median of ``--runs`` runs:
+
+- the cumulative import time of ``function_app``;
+- self time per top-level package;
+- the slowest individual modules.
+
+The script exits non-zero when ``function_app`` takes longer than
+``--budget-ms``. It also fails when a module listed in ``--forbid`` is
+loaded at import time. Those are the clients that HTTP routes should only
+load on first use. ``--json`` writes the results for CI.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Loaded on first use by the app.* packages; importing any of them at startup is a regression.
+_DEFAULT_FORBIDDEN = [
+    "openai",
+    "httpx",
+    "azure.cosmos",
+    "azure.core",
+    "jwt",
+    "cryptography",
+    "requests",
+    "langchain_openai",
+    "langgraph",
+]
+
+
+def _import_once(module: str) -> dict[str, tuple[int, int]]:
+    """Return module -> (self us, cumulative us) for one fresh interpreter."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=_ROOT,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if completed.returncode != 0:
+        sys.stderr.write(completed.stderr)
+        raise SystemExit(f"import {module} failed")
+    timings: dict[str, tuple[int, int]] = {}
+    for line in completed.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            timings[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return timings
+
+
+def _median_timings(runs: list[dict[str, tuple[int, int]]]) -> dict[str, tuple[float, float]]:
+    names = set().union(*runs)
+    return {
+        name: (
+            statistics.median(run.get(name, (0, 0))[0] for run in runs),
+            statistics.median(run.get(name, (0, 0))[1] for run in runs),
+        )
+        for name in names
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="function_app")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to list")
+    parser.add_argument("--budget-ms", type=float, default=150.0, help="maximum cumulative import time")
+    parser.add_argument("--forbid", nargs="*", default=_DEFAULT_FORBIDDEN, help="modules that must not be imported")
+    parser.add_argument("--json", help="write results to this path")
+    args = parser.parse_args()
+
+    _import_once(args.module)
+    timings = _median_timings([_import_once(args.module) for _ in range(args.runs)])
+    total_ms = timings.get(args.module, (0, 0))[1] / 1000
+
+    by_package: dict[str, float] = defaultdict(float)
+    for name, (self_us, _) in timings.items():
+        by_package[name.split(".")[0]] += self_us / 1000
+    slowest = sorted(timings.items(), key=lambda entry: entry[1][0], reverse=True)[: args.top]
+    loaded_forbidden = sorted(
+        {root for root in args.forbid for name in timings if name == root or name.startswith(root + ".")}
+    )
+
+    print(f"{args.module}: {total_ms:.1f} ms cumulative (median of {args.runs}, budget {args.budget_ms:.0f} ms)")
+    print("self time by package:")
+    for package, ms in sorted(by_package.items(), key=lambda entry: entry[1], reverse=True)[: args.top]:
+        print(f"  {package:<32} {ms:8.1f} ms")
+    print("slowest modules (self / cumulative):")
+    for name, (self_us, cumulative_us) in slowest:
+        print(f"  {name:<48} {self_us / 1000:8.1f} {cumulative_us / 1000:8.1f} ms")
+
+    failures = []
+    if total_ms > args.budget_ms:
+        failures.append(f"{args.module} import took {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    if loaded_forbidden:
+        failures.append("imported at startup: " + ", ".join(loaded_forbidden))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "module": args.module,
+                    "totalMs": round(total_ms, 1),
+                    "budgetMs": args.budget_ms,
+                    "packages": {package: round(ms, 2) for package, ms in by_package.items()},
+                    "forbiddenImported": loaded_forbidden,
+                },
+                file,
+                indent=2,
+            )
+    for failure in failures:
+        print(f"BUDGET {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,478 @@
+"""Dict-backed stand-in for the Cosmos container clients used by app.cosmos.repository.
+
+It plugs in underneath the repositories (``install()`` swaps
+``get_container`` in both the sync and the async repository), so the real
+chunking, batching and projection code stays on the measured path. Only the SQL subset the app
+issues is understood:
+
+    SELECT * | VALUE c.f | c.a, c.b FROM c
+    [WHERE cond AND ...]  with  c.f = @p | c.f >= @p | ARRAY_CONTAINS(@p, c.f) | c.f IN (@p, ...)
+    [ORDER BY c.f ASC|DESC]
+
+Equality, ``ARRAY_CONTAINS`` and ``IN`` conditions are answered from hash
+indexes built on first use, so lookups stay cheap at a million items. Every
+call reports a rough RU charge through ``response_hook``, like the SDK does.
+``read_feed_ranges`` splits a container into ``FEED_RANGES`` ranges by a
+hash of the partition key, for tools that read ranges in parallel.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import copy
+import operator
+import re
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator
+
+from azure.cosmos import exceptions as cosmos_exceptions  # type: ignore
+
+_SELECT = re.compile(
+    r"^\s*SELECT\s+(?P<projection>.+?)\s+FROM\s+c"
+    r"(?:\s+WHERE\s+(?P<where>.+?))?"
+    r"(?:\s+ORDER\s+BY\s+c\.(?P<order>\w+)(?:\s+(?P<direction>ASC|DESC))?)?\s*$",
+    re.IGNORECASE | re.DOTALL,
+)
+_COMPARE = re.compile(r"^c\.(\w+)\s*(=|>=|<=|>|<)\s*(@\w+)$")
+_CONTAINS = re.compile(r"^ARRAY_CONTAINS\(\s*(@\w+)\s*,\s*c\.(\w+)\s*\)$", re.IGNORECASE)
+_IN = re.compile(r"^c\.(\w+)\s+IN\s*\(([^)]*)\)$", re.IGNORECASE)
+_OPERATORS: dict[str, Callable[[Any, Any], bool]] = {
+    "=": operator.eq,
+    ">=": operator.ge,
+    "<=": operator.le,
+    ">": operator.gt,
+    "<": operator.lt,
+}
+
+# Rough RU model: 1 RU per point read, ~5.5 RU per 1 KB write, 2.5 RU per query plus a little per row.
+_READ_RU = 1.0
+_WRITE_RU = 5.5
+_QUERY_RU = 2.5
+_QUERY_ROW_RU = 0.05
+
+# Partition key paths for the containers the app uses; anything else is /id.
+FEED_RANGES = 4
+DEFAULT_PARTITION_KEYS = {
+    "system": "type",
+    "news_items": "id",
+    "articles": "id",
+    "article_days": "dayKey",
+    "users": "id",
+    "feeds": "userId",
+}
+
+
+# Set while an AsyncFakeContainer delegates, since it has already awaited the latency.
+_LATENCY_AWAITED: contextvars.ContextVar[bool] = contextvars.ContextVar("latency_awaited", default=False)
+
+
+def _not_found() -> Exception:
+    return cosmos_exceptions.CosmosResourceNotFoundError(status_code=404, message="Resource not found")
+
+
+class _Pager:
+    def __init__(self, items: list[Any], page_size: int, token: str | None) -> None:
+        self._items = items
+        self._page_size = page_size
+        self._offset = int(token or 0)
+        self.continuation_token: str | None = None
+
+    def __iter__(self) -> Iterator[list[Any]]:
+        return self
+
+    def __next__(self) -> list[Any]:
+        if self._offset >= len(self._items):
+            raise StopIteration
+        end = self._offset + self._page_size
+        page = self._items[self._offset:end]
+        self._offset = end
+        self.continuation_token = str(end) if end < len(self._items) else None
+        return page
+
+
+class _QueryResult:
+    def __init__(self, items: list[Any], page_size: int) -> None:
+        self._items = items
+        self._page_size = page_size
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._items)
+
+    def by_page(self, continuation_token: str | None = None) -> _Pager:
+        return _Pager(self._items, self._page_size, continuation_token)
+
+
+class FakeContainer:
+    def __init__(
+        self, name: str, partition_key_field: str, calls: Counter, charges: Counter, latency_s: float = 0.0
+    ) -> None:
+        self.name = name
+        self.partition_key_field = partition_key_field
+        self.latency_s = latency_s
+        self._calls = calls
+        self._charges = charges
+        self._items: dict[tuple[Any, str], dict[str, Any]] = {}
+        self._indexes: dict[str, dict[Any, set[tuple[Any, str]]]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _count(self, op: str) -> None:
+        self._calls[f"{self.name}.{op}"] += 1
+        if self.latency_s and not _LATENCY_AWAITED.get():
+            time.sleep(self.latency_s)
+
+    def _charge(self, kwargs: dict[str, Any], ru: float) -> None:
+        self._charges[self.name] += ru
+        hook = kwargs.get("response_hook")
+        if hook is not None:
+            hook({"x-ms-request-charge": f"{ru:.2f}"}, None)
+
+    @staticmethod
+    def _write_ru(item: dict[str, Any]) -> float:
+        return _WRITE_RU * max(1.0, len(repr(item)) / 1024)
+
+    def _key(self, item: dict[str, Any]) -> tuple[Any, str]:
+        return item.get(self.partition_key_field), item["id"]
+
+    def _index_add(self, key: tuple[Any, str], item: dict[str, Any]) -> None:
+        for field, index in self._indexes.items():
+            for value in _index_values(item.get(field)):
+                index.setdefault(value, set()).add(key)
+
+    def _index_remove(self, key: tuple[Any, str], item: dict[str, Any]) -> None:
+        for field, index in self._indexes.items():
+            for value in _index_values(item.get(field)):
+                index.get(value, set()).discard(key)
+
+    def _index(self, field: str) -> dict[Any, set[tuple[Any, str]]]:
+        index = self._indexes.get(field)
+        if index is None:
+            index = {}
+            for key, item in self._items.items():
+                for value in _index_values(item.get(field)):
+                    index.setdefault(value, set()).add(key)
+            self._indexes[field] = index
+        return index
+
+    def _write(self, item: dict[str, Any]) -> dict[str, Any]:
+        stored = copy.deepcopy(item)
+        stored["_etag"] = uuid.uuid4().hex
+        key = self._key(stored)
+        previous = self._items.get(key)
+        if previous is not None:
+            self._index_remove(key, previous)
+        self._items[key] = stored
+        self._index_add(key, stored)
+        return copy.deepcopy(stored)
+
+    def seed(self, items: Iterable[dict[str, Any]]) -> None:
+        """Bulk-load items without counting calls or copying."""
+        with self._lock:
+            for item in items:
+                item.setdefault("_etag", "seed")
+                self._items[self._key(item)] = item
+            self._indexes.clear()
+
+    def create_item(self, body: dict[str, Any], **kwargs: Any) -> dict[str, Any]:
+        self._count("create")
+        self._charge(kwargs, self._write_ru(body))
+        with self._lock:
+            if self._key(body) in self._items:
+                raise cosmos_exceptions.CosmosResourceExistsError(status_code=409, message="Conflict")
+            return self._write(body)
+
+    def upsert_item(self, body: dict[str, Any], **kwargs: Any) -> dict[str, Any]:
+        self._count("upsert")
+        self._charge(kwargs, self._write_ru(body))
+        with self._lock:
+            return self._write(body)
+
+    def replace_item(
+        self, item: str, body: dict[str, Any], etag: str | None = None, match_condition: Any = None, **kwargs: Any
+    ) -> dict[str, Any]:
+        self._count("replace")
+        self._charge(kwargs, self._write_ru(body))
+        with self._lock:
+            current = self._items.get(self._key(body))
+            if current is None:
+                raise _not_found()
+            if etag is not None and current.get("_etag") != etag:
+                raise cosmos_exceptions.CosmosAccessConditionFailedError(
+                    status_code=412, message="Precondition failed"
+                )
+            return self._write(body)
+
+    def read_item(self, item: str, partition_key: Any, **kwargs: Any) -> dict[str, Any]:
+        self._count("read")
+        self._charge(kwargs, _READ_RU)
+        with self._lock:
+            stored = self._items.get((partition_key, item))
+            if stored is None:
+                raise _not_found()
+            return copy.deepcopy(stored)
+
+    def patch_item(
+        self, item: str, partition_key: Any, patch_operations: list[dict[str, Any]], **kwargs: Any
+    ) -> dict[str, Any]:
+        self._count("patch")
+        self._charge(kwargs, _WRITE_RU)
+        with self._lock:
+            stored = self._items.get((partition_key, item))
+            if stored is None:
+                raise _not_found()
+            patched = copy.deepcopy(stored)
+            for operation in patch_operations:
+                if operation["op"] not in ("set", "add", "replace") or operation["path"].count("/") != 1:
+                    raise NotImplementedError(f"patch operation {operation}")
+                patched[operation["path"][1:]] = operation["value"]
+            return self._write(patched)
+
+    def delete_item(self, item: str, partition_key: Any, **kwargs: Any) -> None:
+        self._count("delete")
+        self._charge(kwargs, _WRITE_RU)
+        with self._lock:
+            stored = self._items.pop((partition_key, item), None)
+            if stored is None:
+                raise _not_found()
+            self._index_remove((partition_key, item), stored)
+
+    def execute_item_batch(self, batch_operations: list[tuple[str, tuple]], partition_key: Any, **kwargs: Any) -> list:
+        self._count("batch")
+        self._charge(kwargs, sum(self._write_ru(args[0]) for _, args in batch_operations))
+        with self._lock:
+            for operation, args in batch_operations:
+                if operation != "upsert":
+                    raise NotImplementedError(f"batch operation {operation}")
+                self._write(args[0])
+        return []
+
+    def _feed_range_of(self, item: dict[str, Any]) -> int:
+        return zlib.crc32(str(item.get(self.partition_key_field)).encode("utf-8")) % FEED_RANGES
+
+    def read_feed_ranges(self, **kwargs: Any) -> list[dict[str, Any]]:
+        return [{"fakeRange": index} for index in range(FEED_RANGES)]
+
+    def query_items(
+        self,
+        query: str,
+        parameters: list[dict[str, Any]] | None = None,
+        partition_key: Any = None,
+        max_item_count: int | None = None,
+        **kwargs: Any,
+    ) -> _QueryResult:
+        self._count("query")
+        match = _SELECT.match(query)
+        if not match:
+            raise NotImplementedError(f"Unsupported query: {query}")
+        params = {param["name"]: param["value"] for param in parameters or []}
+        with self._lock:
+            keys, filters = self._plan(match.group("where"), params)
+            if partition_key is not None:
+                filters.append(lambda item: item.get(self.partition_key_field) == partition_key)
+            feed_range = kwargs.pop("feed_range", None)
+            if feed_range is not None:
+                filters.append(lambda item: self._feed_range_of(item) == feed_range["fakeRange"])
+            candidates = (self._items[key] for key in keys) if keys is not None else self._items.values()
+            rows = [item for item in candidates if all(check(item) for check in filters)]
+        order = match.group("order")
+        if order:
+            descending = (match.group("direction") or "ASC").upper() == "DESC"
+            rows.sort(key=lambda item: (item.get(order) is not None, item.get(order) or ""), reverse=descending)
+        projected = [_project(match.group("projection"), item) for item in rows]
+        self._charge(kwargs, _QUERY_RU + _QUERY_ROW_RU * len(projected))
+        return _QueryResult(projected, max_item_count or 100)
+
+    def _plan(
+        self, where: str | None, params: dict[str, Any]
+    ) -> tuple[set[tuple[Any, str]] | None, list[Callable[[dict[str, Any]], bool]]]:
+        """Narrow candidates with indexes where possible; return the remaining filters."""
+        keys: set[tuple[Any, str]] | None = None
+        filters: list[Callable[[dict[str, Any]], bool]] = []
+        for condition in re.split(r"\s+AND\s+", where or "", flags=re.IGNORECASE):
+            condition = condition.strip()
+            if not condition:
+                continue
+            if compare := _COMPARE.match(condition):
+                field, op, name = compare.groups()
+                value = params[name]
+                if op == "=":
+                    matched = set(self._index(field).get(value, ()))
+                    keys = matched if keys is None else keys & matched
+                else:
+                    filters.append(
+                        lambda item, f=field, o=_OPERATORS[op], v=value: item.get(f) is not None and o(item[f], v)
+                    )
+            elif contains := _CONTAINS.match(condition):
+                name, field = contains.groups()
+                index = self._index(field)
+                matched = set().union(*(index.get(value, ()) for value in params[name])) if params[name] else set()
+                keys = matched if keys is None else keys & matched
+            elif within := _IN.match(condition):
+                field, names = within.groups()
+                index = self._index(field)
+                matched = set().union(*(index.get(params[name.strip()], ()) for name in names.split(",")))
+                keys = matched if keys is None else keys & matched
+            else:
+                raise NotImplementedError(f"Unsupported condition: {condition}")
+        return keys, filters
+
+
+def _index_values(value: Any) -> list[Any]:
+    if value is None or isinstance(value, (dict, list)):
+        return []
+    return [value]
+
+
+def _project(projection: str, item: dict[str, Any]) -> Any:
+    projection = projection.strip()
+    if projection == "*":
+        return copy.deepcopy(item)
+    if projection.upper().startswith("VALUE "):
+        return item.get(projection[6:].strip().removeprefix("c."))
+    fields = [field.strip().removeprefix("c.") for field in projection.split(",")]
+    return {field: copy.deepcopy(item[field]) for field in fields if field in item}
+
+
+class FakeCosmos:
+    """A database of FakeContainers plus a per-operation call counter."""
+
+    def __init__(self, partition_keys: dict[str, str] | None = None, latency_s: float = 0.0) -> None:
+        self.latency_s = latency_s
+        self.calls: Counter = Counter()
+        self.charges: Counter = Counter()
+        self._partition_keys = {**DEFAULT_PARTITION_KEYS, **(partition_keys or {})}
+        self._containers: dict[str, FakeContainer] = {}
+        self._async_containers: dict[str, AsyncFakeContainer] = {}
+        self._lock = threading.Lock()
+
+    def get_container(self, container_name: str) -> FakeContainer:
+        with self._lock:
+            container = self._containers.get(container_name)
+            if container is None:
+                container = FakeContainer(
+                    container_name,
+                    self._partition_keys.get(container_name, "id"),
+                    self.calls,
+                    self.charges,
+                    self.latency_s,
+                )
+                self._containers[container_name] = container
+            return container
+
+    def get_async_container(self, container_name: str) -> "AsyncFakeContainer":
+        container = self.get_container(container_name)
+        with self._lock:
+            wrapper = self._async_containers.get(container_name)
+            if wrapper is None:
+                wrapper = self._async_containers[container_name] = AsyncFakeContainer(container)
+            return wrapper
+
+    def set_latency(self, latency_s: float) -> None:
+        with self._lock:
+            self.latency_s = latency_s
+            for container in self._containers.values():
+                container.latency_s = latency_s
+
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def total_charge(self) -> float:
+        return sum(self.charges.values())
+
+
+async def _aiter(items: Iterable[Any]) -> AsyncIterator[Any]:
+    for item in items:
+        yield item
+
+
+class _AsyncPager:
+    """Async ``by_page`` iterator; the query runs when the first page is requested, as in the SDK."""
+
+    def __init__(self, run: Callable[[], Any], token: str | None) -> None:
+        self._run = run
+        self._token = token
+        self._pager: _Pager | None = None
+
+    @property
+    def continuation_token(self) -> str | None:
+        return self._pager.continuation_token if self._pager else None
+
+    def __aiter__(self) -> "_AsyncPager":
+        return self
+
+    async def __anext__(self) -> AsyncIterator[Any]:
+        if self._pager is None:
+            self._pager = (await self._run()).by_page(self._token)
+        try:
+            return _aiter(next(self._pager))
+        except StopIteration:
+            raise StopAsyncIteration from None
+
+
+class _AsyncQueryResult:
+    def __init__(self, run: Callable[[], Any]) -> None:
+        self._run = run
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        for item in await self._run():
+            yield item
+
+    def by_page(self, continuation_token: str | None = None) -> _AsyncPager:
+        return _AsyncPager(self._run, continuation_token)
+
+
+class AsyncFakeContainer:
+    """``azure.cosmos.aio``-shaped view of a FakeContainer; latency is awaited instead of slept."""
+
+    def __init__(self, container: FakeContainer) -> None:
+        self._container = container
+
+    async def _call(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        if self._container.latency_s:
+            await asyncio.sleep(self._container.latency_s)
+        token = _LATENCY_AWAITED.set(True)
+        try:
+            return getattr(self._container, method)(*args, **kwargs)
+        finally:
+            _LATENCY_AWAITED.reset(token)
+
+    async def create_item(self, body: dict[str, Any], **kwargs: Any) -> dict[str, Any]:
+        return await self._call("create_item", body, **kwargs)
+
+    async def upsert_item(self, body: dict[str, Any], **kwargs: Any) -> dict[str, Any]:
+        return await self._call("upsert_item", body, **kwargs)
+
+    async def replace_item(self, item: str, body: dict[str, Any], **kwargs: Any) -> dict[str, Any]:
+        return await self._call("replace_item", item, body, **kwargs)
+
+    async def read_item(self, item: str, partition_key: Any, **kwargs: Any) -> dict[str, Any]:
+        return await self._call("read_item", item, partition_key, **kwargs)
+
+    async def patch_item(self, item: str, partition_key: Any, **kwargs: Any) -> dict[str, Any]:
+        return await self._call("patch_item", item, partition_key, **kwargs)
+
+    async def delete_item(self, item: str, partition_key: Any, **kwargs: Any) -> None:
+        return await self._call("delete_item", item, partition_key, **kwargs)
+
+    def query_items(self, query: str, **kwargs: Any) -> _AsyncQueryResult:
+        return _AsyncQueryResult(lambda: self._call("query_items", query, **kwargs))
+
+
+def install(fake: FakeCosmos) -> Callable[[], None]:
+    """Route both Cosmos repositories to ``fake``; returns a function that undoes it."""
+    from app.cosmos import async_repository, repository
+
+    original = repository.get_container, async_repository.get_container
+    repository.get_container = fake.get_container
+    async_repository.get_container = fake.get_async_container
+
+    def uninstall() -> None:
+        repository.get_container, async_repository.get_container = original
+
+    return uninstall
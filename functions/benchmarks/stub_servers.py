@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import copy
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+CHAT_COMPLETION = {
+    "id": "chatcmpl-stub",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "stub",
+    "choices": [
+        {
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": "This is a stub response."},
+        }
+    ],
+    "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+}
+
+
+class _JsonHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 with Content-Length keeps connections alive between requests.
+    protocol_version = "HTTP/1.1"
+    # Send each response in one segment so Nagle/delayed-ACK do not skew latency.
+    disable_nagle_algorithm = True
+    wbufsize = 64 * 1024
+
+    def log_message(self, format: str, *args: Any) -> None:
+        return
+
+    def _read_json(self) -> dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        return json.loads(raw or b"{}")
+
+    def _send_json(self, status: int, payload: Any, headers: dict[str, str] | None = None) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ChatStubHandler(_JsonHandler):
+    """Chat-completions stub with a fixed latency and a share of 429 responses.
+
+    JSON-mode requests get an object with a summary and every CEFR level, so
+    combined generation validates. Counters are class attributes; subclass
+    (or reset them) per run.
+    """
+
+    latency_s = 0.0
+    throttle_rate = 0.0
+    retry_after_ms = 100
+    requests_served = 0
+    throttled = 0
+    _lock = threading.Lock()
+
+    def do_POST(self) -> None:  # noqa: N802
+        payload = self._read_json()
+        cls = type(self)
+        with cls._lock:
+            cls.requests_served += 1
+            throttle = random.random() < self.throttle_rate
+            if throttle:
+                cls.throttled += 1
+        if throttle:
+            self._send_json(
+                429,
+                {"error": {"code": "429", "message": "Rate limit is exceeded."}},
+                headers={"retry-after-ms": str(self.retry_after_ms)},
+            )
+            return
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        response = CHAT_COMPLETION
+        if (payload.get("response_format") or {}).get("type") == "json_object":
+            content = {"summary": "Stub summary."}
+            content.update({level: f"Stub {level} text." for level in ("A1", "A2", "B1", "B2", "C1", "C2")})
+            response = copy.deepcopy(CHAT_COMPLETION)
+            response["choices"][0]["message"]["content"] = json.dumps(content)
+        self._send_json(200, response)
+
+
+class TavilyStubHandler(_JsonHandler):
+    """Tavily ``/search`` stub returning ``max_results`` canned articles per query.
+
+    URLs include ``run`` so bumping it between job runs yields fresh articles.
+    """
+
+    run = 0
+    requests_served = 0
+    _lock = threading.Lock()
+
+    def do_POST(self) -> None:  # noqa: N802
+        payload = self._read_json()
+        cls = type(self)
+        with cls._lock:
+            cls.requests_served += 1
+        query = payload.get("query", "")
+        slug = query.lower().replace(" ", "-")
+        results = [
+            {
+                "url": f"https://news.example.com/{slug}/{self.run}/{n}",
+                "title": f"{query} story {self.run}-{n}",
+                "content": f"{query} report {self.run}-{n}. "
+                + " ".join(f"w{zlib.crc32(f'{slug}/{self.run}/{n}/{i}'.encode())}" for i in range(60)),
+                "published_date": "2025-12-23",
+                "score": 0.9,
+            }
+            for n in range(int(payload.get("max_results") or 5))
+        ]
+        self._send_json(200, {"query": query, "results": results})
+
+
+class JwksStubHandler(_JsonHandler):
+    jwks: dict[str, Any] = {"keys": []}
+    requests_served = 0
+
+    def do_GET(self) -> None:  # noqa: N802
+        type(self).requests_served += 1
+        self._send_json(200, self.jwks)
+
+
+class StubServer:
+    """Run a handler class on an ephemeral localhost port in a daemon thread."""
+
+    def __init__(self, handler: type[BaseHTTPRequestHandler]) -> None:
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._server.shutdown()
+        self._server.server_close()
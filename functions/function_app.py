@@ -1,41 +1,28 @@
-import hashlib
+import asyncio
+import base64
 import json
 import logging
 import os
 import re
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable
 
 import azure.functions as func  # type: ignore
 
-from app.aoai.service import chat_once
-from app.aoai.prompts import cefr_prompt, summary_prompt
+from app.aoai.service import CEFR_LEVELS
+from app.api.cache import etag_matches, get_generation_async, response_cache
+from app.api.encoding import JsonBodyWriter, negotiate_encoding, write_list_object
 from app.auth.clerk import get_bearer_token, verify_clerk_jwt
-from app.cosmos.repository import create_item, safe_read_item, query_items, upsert_item
-from app.tavily.service import search_company_news
+from app.cosmos import async_repository
+from app.cosmos.subscriptions import enabled_companies, update_subscriptions_async
+from app.news.article_days import article_days_container
+from app.news.feeds import FEED_DAYS, drop_feed_async, read_feed_async, rebuild_feed_async
+from app.news.job import JOB_QUEUE_NAME, Deadline, handle_job_message, run_news_job
+from app.news.levels import LevelGenerationError, get_level_text, user_level
+from app.news.partitions import DAY_KEY_FIELD, day_key_condition, news_partition_key, shared_partition_value
 
 app = func.FunctionApp()
 
-def _normalize_partition_key(pk_field: str) -> str:
-    return pk_field.lstrip("/").strip()
-
-
-def _get_partition_key_value(pk_field: str, item_id: str) -> str:
-    if pk_field == "id":
-        return item_id
-    return os.environ.get("COSMOS_PARTITION_VALUE", "items")
-
-
-def _clean_plain_text(text: str) -> str:
-    cleaned = (text or "").strip()
-    cleaned = re.sub(r"^Here is your rewritten text.*?:\s*", "", cleaned, flags=re.IGNORECASE)
-    cleaned = re.sub(r"^Here is.*?:\s*", "", cleaned, flags=re.IGNORECASE)
-    cleaned = cleaned.replace("**", "").replace("`", "")
-    cleaned = cleaned.replace("\n", " ").replace("\r", " ")
-    cleaned = re.sub(r"\s+", " ", cleaned).strip()
-    return cleaned
-
-
-
 def _require_clerk_user_id(req: func.HttpRequest) -> tuple[str | None, func.HttpResponse | None]:
     token = get_bearer_token(req.headers)
     if not token:
@@ -51,149 +38,389 @@ def _require_clerk_user_id(req: func.HttpRequest) -> tuple[str | None, func.Http
     return user_id, None
 
 
+_LIST_FIELDS = ["id", "title", "url", "date", "fetchedAt", "company", "companyType", "content"]
+_DEFAULT_PAGE_SIZE = 50
+_MAX_PAGE_SIZE = 200
+_MAX_RANGE_DAYS = 30
+
+
+def _parse_limit(value: str | None) -> int:
+    if not value:
+        return _DEFAULT_PAGE_SIZE
+    if not value.isdigit() or int(value) < 1:
+        raise ValueError("limit must be a positive integer")
+    return min(int(value), _MAX_PAGE_SIZE)
+
+
+def _parse_range(value: str) -> str:
+    match = re.fullmatch(r"(\d+)d", value)
+    if not match or not 1 <= int(match.group(1)) <= _MAX_RANGE_DAYS:
+        raise ValueError(f"range must be between 1d and {_MAX_RANGE_DAYS}d")
+    since = datetime.now(timezone.utc) - timedelta(days=int(match.group(1)))
+    return since.isoformat()
+
+
+def _parse_level(value: str | None) -> str | None:
+    if not value:
+        return None
+    level = str(value).strip().upper()
+    if level not in CEFR_LEVELS:
+        raise ValueError(f"level must be one of: {' | '.join(CEFR_LEVELS)}")
+    return level
+
+
+def _stored_level(user: dict | None) -> str | None:
+    try:
+        return _parse_level((user or {}).get("level"))
+    except ValueError:
+        return None
+
+
+def _encode_cursor(token: str | None) -> str | None:
+    if not token:
+        return None
+    return base64.urlsafe_b64encode(token.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str | None) -> str | None:
+    if not cursor:
+        return None
+    try:
+        return base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+    except (ValueError, UnicodeError) as exc:
+        raise ValueError("cursor is invalid") from exc
+
+
+def _feed_offset(continuation: str | None) -> int | None:
+    """Offset into the feed for a ``feed:<n>`` cursor, 0 for none, None for a query cursor."""
+    if continuation is None:
+        return 0
+    prefix, _, offset = continuation.partition(":")
+    if prefix == "feed" and offset.isdigit():
+        return int(offset)
+    return None
+
+
+async def _feed_items(items: list[dict], user_id: str) -> AsyncIterator[dict]:
+    for item in items:
+        yield {**item, "userId": user_id}
+
+
+def _list_fields(level: str | None) -> list[str]:
+    if level:
+        return [*_LIST_FIELDS, f"content_{level.lower()}"]
+    return list(_LIST_FIELDS)
+
+
+def _projection(fields: list[str]) -> str:
+    return ", ".join(f"c.{field}" for field in fields)
+
+
+async def _cached_json_response(
+    req: func.HttpRequest,
+    key: tuple,
+    write: Callable[[JsonBodyWriter], Awaitable[None]],
+    generation: str = "",
+    cache: bool = True,
+) -> func.HttpResponse:
+    # Each content coding is cached separately, already compressed.
+    encoding = negotiate_encoding(req.headers.get("Accept-Encoding"))
+    cache_key = (*key, encoding)
+    cached = response_cache.get(cache_key) if cache else None
+    if cached and cached[0] == generation:
+        _, body, content_encoding, etag = cached
+    else:
+        writer = JsonBodyWriter(encoding)
+        await write(writer)
+        body, content_encoding, etag = writer.finish()
+        if cache:
+            response_cache.set(cache_key, (generation, body, content_encoding, etag))
+
+    headers = {
+        "ETag": etag if content_encoding is None else f"W/{etag}",
+        "Cache-Control": "private, no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(req.headers.get("If-None-Match"), etag):
+        return func.HttpResponse(status_code=304, headers=headers)
+    if content_encoding:
+        headers["Content-Encoding"] = content_encoding
+    return func.HttpResponse(
+        body=body,
+        mimetype="application/json",
+        status_code=200,
+        headers=headers,
+    )
+
+
+async def _join_articles(references: list[dict], fields: list[str]) -> AsyncIterator[dict]:
+    if not references:
+        return
+    articles_container = os.environ.get("COSMOS_ARTICLES_CONTAINER", "articles")
+    articles = await async_repository.read_items_by_ids(
+        articles_container,
+        [ref["articleId"] for ref in references if ref.get("articleId")],
+        fields=fields,
+    )
+
+    for ref in references:
+        article_id = ref.get("articleId")
+        if not article_id:
+            # Legacy per-user rows still carry the full generated content.
+            yield {field: ref[field] for field in [*fields, "userId"] if field in ref}
+            continue
+        article = articles.get(article_id)
+        if not article:
+            logging.warning("Article id=%s missing for reference id=%s", article_id, ref.get("id"))
+            continue
+        item = dict(article)
+        item.update(
+            {
+                "userId": ref.get("userId"),
+                "company": ref.get("company", article.get("company")),
+                "companyType": ref.get("companyType", article.get("companyType")),
+            }
+        )
+        yield item
+
+
 @app.timer_trigger(schedule="0 0 0 * * *", arg_name="myTimer", run_on_startup=False,
               use_monitor=False) 
-def get_news(myTimer: func.TimerRequest) -> None:
+@app.queue_output(arg_name="jobs", queue_name=JOB_QUEUE_NAME, connection="AzureWebJobsStorage")
+def get_news(myTimer: func.TimerRequest, jobs: func.Out[list[str]]) -> None:
     
     if myTimer.past_due:
         logging.info('The timer is past due!')
 
-    container = os.environ.get("COSMOS_CONTAINER", "news_items")
-    pk_field = _normalize_partition_key(os.environ.get("COSMOS_PARTITION_KEY", "id"))
-    users_container = os.environ.get("COSMOS_USERS_CONTAINER", "users")
-    users = query_items(users_container, "SELECT * FROM c")
-    now = datetime.now(timezone.utc).isoformat()
-    deployment = os.environ.get("AZURE_OPENAI_DEPLOYMENT", "")
-
-    for user in users:
-        user_id = user.get("userId") or user.get("id")
-        company_flags = user.get("company") or {}
-        if not user_id or not isinstance(company_flags, dict):
-            continue
+    messages = run_news_job(Deadline.from_env())
+    if messages:
+        jobs.set([json.dumps(message) for message in messages])
 
-        companies = [name for name, enabled in company_flags.items() if enabled]
-        if not companies:
-            continue
 
-        for company in companies:
-            results = search_company_news(company, max_results=3)
-            logging.info("Tavily results for %s: %s", company, len(results))
-
-            for result in results:
-                title = result.get("title", "")
-                content = result.get("content", "")
-                url = result.get("url", "")
-                published_at = result.get("published_date") or result.get("published_at")
-                if not (title or content):
-                    continue
-
-                item_id = hashlib.sha256(f"{user_id}:{url or title or content}".encode("utf-8")).hexdigest()
-                pk_value = _get_partition_key_value(pk_field, item_id)
-
-                existing = safe_read_item(container, item_id, pk_value)
-                if existing:
-                    logging.info("Skip existing item id=%s title=%s", item_id, title)
-                    continue
-
-                summary_source = content or title
-                summary = summary_source
-                if deployment and summary_source:
-                    try:
-                        system_prompt, user_prompt = summary_prompt(summary_source)
-                        summary = chat_once(
-                            deployment=deployment,
-                            message=user_prompt,
-                            system_prompt=system_prompt,
-                        )
-                        summary = _clean_plain_text(summary)
-                    except Exception:
-                        logging.exception("AOAI summarization failed, using original content")
-
-                level_contents: dict[str, str] = {}
-                if deployment and summary_source:
-                    for level in ("A1", "A2", "B1", "B2", "C1", "C2"):
-                        try:
-                            system_prompt, user_prompt = cefr_prompt(level, summary_source)
-                            level_text = chat_once(
-                                deployment=deployment,
-                                message=user_prompt,
-                                system_prompt=system_prompt,
-                            )
-                            level_text = _clean_plain_text(level_text)
-                            level_contents[f"content_{level.lower()}"] = level_text
-                        except Exception:
-                            logging.exception("AOAI CEFR %s generation failed", level)
-                else:
-                    logging.info("AOAI deployment not set; skipping CEFR generation")
-
-                item = {
-                    "id": item_id,
-                    "userId": user_id,
-                    "company": company,
-                    "companyType": company.lower(),
-                    "title": title,
-                    "content": summary,
-                    "date": published_at,
-                    "fetchedAt": now,
-                }
-                item.update(level_contents)
-                if pk_field and pk_field != "id":
-                    item[pk_field] = pk_value
-                if url:
-                    item["url"] = url
-
-                create_item(container, item, partition_key=pk_value)
-                logging.info("Saved item id=%s title=%s", item_id, title)
+@app.function_name(name="news_job_worker")
+@app.queue_trigger(arg_name="msg", queue_name=JOB_QUEUE_NAME, connection="AzureWebJobsStorage")
+@app.queue_output(arg_name="jobs", queue_name=JOB_QUEUE_NAME, connection="AzureWebJobsStorage")
+def news_job_worker(msg: func.QueueMessage, jobs: func.Out[list[str]]) -> None:
+    messages = handle_job_message(msg.get_json(), Deadline.from_env())
+    if messages:
+        jobs.set([json.dumps(message) for message in messages])
 
 
 @app.function_name(name="get_news_http")
 @app.route(route="news", methods=["GET"], auth_level=func.AuthLevel.ANONYMOUS)
-def get_news_http(req: func.HttpRequest) -> func.HttpResponse:
-    container = os.environ.get("COSMOS_CONTAINER", "news_items")
+async def get_news_http(req: func.HttpRequest) -> func.HttpResponse:
+    range_value = (req.params.get("range") or "7d").strip().lower()
+    try:
+        page_size = _parse_limit((req.params.get("limit") or "").strip())
+        since = _parse_range(range_value)
+        level = _parse_level(req.params.get("level"))
+        continuation = _decode_cursor((req.params.get("cursor") or "").strip())
+    except ValueError as exc:
+        return func.HttpResponse(str(exc), status_code=400)
+
     user_id = (req.params.get("userId") or "").strip()
+    company_types: list[str] = []
+    if not user_id:
+        company_type = (req.params.get("companyType") or "").strip().lower()
+        if company_type:
+            company_types = sorted({c.strip() for c in company_type.split(",") if c.strip()})
+            if not company_types:
+                return func.HttpResponse("companyType is empty", status_code=400)
+
+    user: dict | None = None
     if user_id:
         users_container = os.environ.get("COSMOS_USERS_CONTAINER", "users")
-        user = safe_read_item(users_container, user_id, user_id)
+        user = await async_repository.safe_read_item(users_container, user_id, user_id)
+    # The user's _etag changes with every settings save on any instance, so
+    # entries for older settings are never served again.
+    version = (user or {}).get("_etag")
+    key = ("news", user_id, version, tuple(company_types), level, range_value, page_size, continuation)
+    return await _cached_json_response(
+        req,
+        key,
+        lambda writer: _write_news(
+            writer, user_id, user, company_types, level, range_value, since, page_size, continuation
+        ),
+        generation=await get_generation_async(),
+    )
+
+
+async def _write_news(
+    writer: JsonBodyWriter,
+    user_id: str,
+    user: dict | None,
+    company_types: list[str],
+    level: str | None,
+    range_value: str,
+    since: str,
+    page_size: int,
+    continuation: str | None,
+) -> None:
+    """Write ``{"range", "items", "cursor"}``, serialising items as they are read."""
+    container = os.environ.get("COSMOS_CONTAINER", "news_items")
+    conditions = ["c.fetchedAt >= @since"]
+    parameters: list[dict] = [{"name": "@since", "value": since}]
+    next_token: str | None = None
+    stream: async_repository.PageStream | None = None
+    offset = _feed_offset(continuation)
+    if user_id and offset is not None and int(range_value[:-1]) <= FEED_DAYS:
+        # Home is one point read of the precomputed feed; the reference query
+        # below stays as the fallback when it is missing or built for another level.
+        feed = await read_feed_async(user_id)
+        if feed is not None and level in (None, feed.get("level")):
+            matching = [item for item in feed.get("items") or [] if (item.get("fetchedAt") or "") >= since]
+            end = offset + page_size
+            more = len(matching) > end
+            await write_list_object(
+                writer,
+                {"range": range_value},
+                "items",
+                _feed_items(matching[offset:end], user_id),
+                lambda: {"cursor": _encode_cursor(f"feed:{end}" if more else None)},
+            )
+            return
+        continuation = None
+    if user_id:
         company_flags = (user or {}).get("company") or {}
-        company_types = [
+        user_company_types = [
             name.lower() for name, enabled in company_flags.items() if enabled
         ]
-        if company_types:
-            items = query_items(
+        # Only the user's own level is projected; without a level the list
+        # carries the summary alone instead of all six content_* bodies.
+        fields = _list_fields(level or _stored_level(user))
+        if user_company_types:
+            if news_partition_key() == DAY_KEY_FIELD:
+                # Only the partitions of the requested days are queried.
+                conditions.append(day_key_condition(since, datetime.now(timezone.utc).isoformat(), parameters))
+            conditions += ["c.userId = @userId", "ARRAY_CONTAINS(@companyTypes, c.companyType)"]
+            parameters += [
+                {"name": "@userId", "value": user_id},
+                {"name": "@companyTypes", "value": user_company_types},
+            ]
+            # Legacy per-user rows hold their content inline, so project the same fields.
+            reference_fields = [*fields, "userId", "articleId"]
+            references, next_token = await async_repository.query_page(
                 container,
-                "SELECT * FROM c WHERE c.userId = @userId AND ARRAY_CONTAINS(@companyTypes, c.companyType)",
-                parameters=[
-                    {"name": "@userId", "value": user_id},
-                    {"name": "@companyTypes", "value": company_types},
-                ],
+                f"SELECT {_projection(reference_fields)} FROM c "
+                f"WHERE {' AND '.join(conditions)} ORDER BY c.fetchedAt DESC",
+                parameters=parameters,
+                max_item_count=page_size,
+                continuation_token=continuation,
             )
         else:
-            items = []
+            references = []
+        items: AsyncIterable[dict] = _join_articles(references, fields)
     else:
-        company_type = (req.params.get("companyType") or "").strip().lower()
-        if company_type:
-            company_types = [c.strip() for c in company_type.split(",") if c.strip()]
-            if not company_types:
-                return func.HttpResponse("companyType is empty", status_code=400)
-            items = query_items(
-                container,
-                "SELECT * FROM c WHERE ARRAY_CONTAINS(@companyTypes, c.companyType)",
-                parameters=[{"name": "@companyTypes", "value": company_types}],
-            )
-        else:
-            items = query_items(container, "SELECT * FROM c")
-    return func.HttpResponse(
-        body=json.dumps(items, ensure_ascii=False), # type: ignore
-        mimetype="application/json",
-        status_code=200,
-    )
+        fields = _list_fields(level)
+        # The day-partitioned listing copy: only the requested days' partitions are queried.
+        conditions.append(day_key_condition(since, datetime.now(timezone.utc).isoformat(), parameters))
+        if company_types:
+            conditions.append("ARRAY_CONTAINS(@companyTypes, c.companyType)")
+            parameters.append({"name": "@companyTypes", "value": company_types})
+        # Articles are written straight from the page as the SDK yields them.
+        items = stream = async_repository.iter_page(
+            article_days_container(),
+            f"SELECT {_projection(fields)} FROM c "
+            f"WHERE {' AND '.join(conditions)} ORDER BY c.fetchedAt DESC",
+            parameters=parameters,
+            max_item_count=page_size,
+            continuation_token=continuation,
+        )
+
+    def tail() -> dict:
+        token = stream.continuation_token if stream is not None else next_token
+        return {"cursor": _encode_cursor(token)}
+
+    await write_list_object(writer, {"range": range_value}, "items", items, tail)
+
+
+
 
+async def _read_legacy_item(item_id: str) -> dict | None:
+    """Per-user rows from before shared articles, which Home still lists under their own ids."""
+    container = os.environ.get("COSMOS_CONTAINER", "news_items")
+    pk_field = news_partition_key()
+    if pk_field == "id":
+        item = await async_repository.safe_read_item(container, item_id, item_id)
+    else:
+        items = await async_repository.query_items(
+            container,
+            "SELECT * FROM c WHERE c.id = @id",
+            parameters=[{"name": "@id", "value": item_id}],
+            partition_key=shared_partition_value(pk_field),
+        )
+        item = items[0] if items else None
+    if item is None or not item.get("articleId"):
+        return item
+    # A reference id: resolve it to its article.
+    articles_container = os.environ.get("COSMOS_ARTICLES_CONTAINER", "articles")
+    return await async_repository.safe_read_item(articles_container, item["articleId"], item["articleId"])
+
+
+@app.function_name(name="get_news_item")
+@app.route(route="news/{articleId}", methods=["GET"], auth_level=func.AuthLevel.ANONYMOUS)
+async def get_news_item(req: func.HttpRequest) -> func.HttpResponse:
+    try:
+        level = _parse_level(req.params.get("level"))
+    except ValueError as exc:
+        return func.HttpResponse(str(exc), status_code=400)
+    article_id = req.route_params.get("articleId", "")
+    articles_container = os.environ.get("COSMOS_ARTICLES_CONTAINER", "articles")
+    article = await async_repository.safe_read_item(articles_container, article_id, article_id)
+    if article is None:
+        article = await _read_legacy_item(article_id)
+    if article is None:
+        return func.HttpResponse("Article not found", status_code=404)
+
+    async def write(writer: JsonBodyWriter) -> None:
+        writer.value({field: article[field] for field in _list_fields(level) if field in article})
+
+    return await _cached_json_response(req, ("article", article_id, level), write, generation=await get_generation_async())
+
+
+@app.function_name(name="get_news_text")
+@app.route(route="news/{articleId}/text", methods=["GET"], auth_level=func.AuthLevel.ANONYMOUS)
+async def get_news_text(req: func.HttpRequest) -> func.HttpResponse:
+    # JWKS refreshes are blocking HTTP calls, so verification runs off the event loop.
+    user_id, error = await asyncio.to_thread(_require_clerk_user_id, req)
+    if error:
+        return error
+    try:
+        level = _parse_level(req.params.get("level"))
+    except ValueError as exc:
+        return func.HttpResponse(str(exc), status_code=400)
+    if level is None:
+        users_container = os.environ.get("COSMOS_USERS_CONTAINER", "users")
+        level = _stored_level(await async_repository.safe_read_item(users_container, user_id, user_id))
+        if level is None:
+            return func.HttpResponse("level is required", status_code=400)
 
+    article_id = req.route_params.get("articleId", "")
+    try:
+        result = await get_level_text(article_id, level)
+    except LevelGenerationError:
+        logging.exception("On-demand CEFR %s generation failed for %s", level, article_id)
+        return func.HttpResponse("Failed to generate text", status_code=502)
+    if result is None:
+        # Legacy per-user rows carry their level texts inline; there is no source to generate from.
+        legacy = await _read_legacy_item(article_id) or {}
+        text = legacy.get(f"content_{level.lower()}")
+        if not text:
+            return func.HttpResponse("Article not found", status_code=404)
+        result = {"text": text, "hit": True, "createdAt": legacy.get("fetchedAt"), "updatedAt": legacy.get("fetchedAt")}
+
+    body = {
+        "articleId": article_id,
+        "level": level,
+        "generatedText": result["text"],
+        "cache": {"hit": result["hit"], "createdAt": result["createdAt"], "updatedAt": result["updatedAt"]},
+    }
+    return func.HttpResponse(body=json.dumps(body, ensure_ascii=False), mimetype="application/json", status_code=200)
 
 
 @app.function_name(name="save_user_news_settings")
 @app.route(route="user-news-settings", methods=["POST"], auth_level=func.AuthLevel.ANONYMOUS)
-def save_user_news_settings(req: func.HttpRequest) -> func.HttpResponse:
+async def save_user_news_settings(req: func.HttpRequest) -> func.HttpResponse:
     try:
         payload = req.get_json()
     except ValueError:
@@ -203,6 +430,11 @@ def save_user_news_settings(req: func.HttpRequest) -> func.HttpResponse:
     if not user_id:
         return func.HttpResponse("userId is required", status_code=400)
 
+    try:
+        level = _parse_level(payload.get("level"))
+    except ValueError as exc:
+        return func.HttpResponse(str(exc), status_code=400)
+
     container = os.environ.get("COSMOS_USERS_CONTAINER", "users")
     now = datetime.now(timezone.utc).isoformat()
     company_flags = {
@@ -219,22 +451,45 @@ def save_user_news_settings(req: func.HttpRequest) -> func.HttpResponse:
         "company": company_flags,
         "updatedAt": now,
     }
-
-    upsert_item(container, item, partition_key=user_id)
+    previous = await async_repository.safe_read_item(container, user_id, user_id)
+    if level is None:
+        # Keep the stored level when an older client only sends company flags.
+        level = _stored_level(previous)
+    if level:
+        item["level"] = level
+
+    # Update the index first: if the settings write then fails, a retry recomputes
+    # the same diff, and a stale extra subscriber is filtered out on read anyway.
+    try:
+        await update_subscriptions_async(user_id, enabled_companies(previous), enabled_companies(item))
+    except Exception:
+        logging.exception("Subscription index update failed for user %s", user_id)
+        return func.HttpResponse("Failed to save settings", status_code=500)
+
+    await async_repository.upsert_item(container, item, partition_key=user_id)
+    if enabled_companies(previous) != enabled_companies(item) or user_level(previous) != user_level(item):
+        try:
+            await rebuild_feed_async(user_id, item)
+        except Exception:
+            # The settings are saved; without a feed, Home falls back to the reference query.
+            logging.exception("Feed rebuild failed for user %s", user_id)
+            await drop_feed_async(user_id)
+    # Cached settings and news lists for this user depend on what was just saved.
+    response_cache.invalidate(lambda key: key[1] == user_id)
     return func.HttpResponse(status_code=204)
 
 
 @app.function_name(name="get_user_news_settings")
 @app.route(route="user-news-settings", methods=["GET"], auth_level=func.AuthLevel.ANONYMOUS)
-def get_user_news_settings(req: func.HttpRequest) -> func.HttpResponse:
+async def get_user_news_settings(req: func.HttpRequest) -> func.HttpResponse:
     user_id = req.params.get("userId")
     if not user_id:
         return func.HttpResponse("userId is required", status_code=400)
 
     container = os.environ.get("COSMOS_USERS_CONTAINER", "users")
-    item = safe_read_item(container, user_id, user_id)
-    return func.HttpResponse(
-        body=json.dumps(item or {}, ensure_ascii=False),
-        mimetype="application/json",
-        status_code=200,
-    )
+
+    async def write(writer: JsonBodyWriter) -> None:
+        writer.value(await async_repository.safe_read_item(container, user_id, user_id) or {})
+
+    # Not cached: another instance may have saved newer settings, and the read is a single point read.
+    return await _cached_json_response(req, ("settings", user_id), write, cache=False)
@@ -0,0 +1 @@
+"""Operational scripts. Run from the functions directory, e.g. ``python -m tools.migrate_news_partitions``."""
@@ -0,0 +1,264 @@
+"""Copy a container into a ``/dayKey``-partitioned container.
+
+Two containers are copied this way: the per-user news container, and the
+shared articles into their listing copy (``app/news/article_days.py``).
+Create the target container with partition key ``/dayKey`` first, then run
+with the app's ``COSMOS_*`` settings::
+
+    python -m tools.migrate_news_partitions --target news_items_by_day
+    python -m tools.migrate_news_partitions --articles
+
+The source is read by feed range, ``--concurrency`` ranges at a time. Each
+item gets ``dayKey`` (the JST day of ``fetchedAt``, else of ``_ts``) and is
+upserted in transactional batches per day. Reads and writes share a budget
+of ``--max-ru-per-second``, charged with the RU each response reports.
+
+The continuation token of every range is checkpointed in the system
+container after each page, so an interrupted run resumes where it stopped.
+Pages are upserted, so copying one twice is harmless. ``--restart``
+ignores the checkpoint.
+
+For the news container: when the run reports ``success``, set
+``COSMOS_CONTAINER`` to the target and ``COSMOS_PARTITION_KEY=/dayKey``
+before the next job run. If the job ran while copying, run again with
+``--restart`` first.
+
+``--articles`` copies ``COSMOS_ARTICLES_CONTAINER`` into
+``COSMOS_ARTICLE_DAYS_CONTAINER``. The articles container stays in use, and
+the job writes the listing copy of every new article itself, so copying
+once after deploying is enough.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Mapping
+
+from app.aoai.limiter import TokenBucket
+from app.cosmos import repository
+from app.cosmos.repository import _BATCH_LIMIT, _chunks, safe_read_item, upsert_item
+from app.news.article_days import article_days_container
+from app.news.partitions import DAY_KEY_FIELD, day_key
+
+MIGRATION_TYPE = "migration_state"
+_SYSTEM_PROPERTIES = ("_rid", "_self", "_etag", "_attachments", "_ts")
+
+
+class RuThrottle:
+    """RU/s budget shared by all workers.
+
+    Calls wait until the budget is non-negative, then pay what the response
+    reports afterwards, so one large page can put the budget into debt.
+    A budget of 0 disables throttling.
+    """
+
+    def __init__(self, per_second: float) -> None:
+        self._bucket = TokenBucket(per_second * 60, capacity=per_second) if per_second > 0 else None
+        self._lock = threading.Lock()
+        self.spent = 0.0
+
+    def wait(self) -> None:
+        while self._bucket is not None:
+            with self._lock:
+                self._bucket.refill(time.monotonic())
+                delay = self._bucket.wait_for(0.0)
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def add_charge(self, headers: Mapping[str, str], *_: Any) -> None:
+        """Cosmos ``response_hook``."""
+        try:
+            charge = float(headers.get("x-ms-request-charge") or 0)
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            self.spent += charge
+            if self._bucket is not None:
+                self._bucket.refill(time.monotonic())
+                self._bucket.take(charge)
+
+
+class Migration:
+    def __init__(
+        self,
+        source: str,
+        target: str,
+        throttle: RuThrottle,
+        page_size: int,
+        state: dict[str, Any],
+        dry_run: bool = False,
+    ) -> None:
+        self.source = source
+        self.target = target
+        self.throttle = throttle
+        self.page_size = page_size
+        self.state = state
+        self.dry_run = dry_run
+        self._lock = threading.Lock()
+
+    def save(self) -> None:
+        self.state["updatedAt"] = datetime.now(timezone.utc).isoformat()
+        upsert_item(_system_container(), self.state, partition_key=MIGRATION_TYPE)
+
+    def _write_page(self, items: list[dict[str, Any]]) -> tuple[int, int]:
+        groups: dict[str, list[dict[str, Any]]] = {}
+        skipped = 0
+        for item in items:
+            doc = migrated(item)
+            if doc is None:
+                skipped += 1
+                logging.warning("Skipping item id=%s without fetchedAt or _ts", item.get("id"))
+                continue
+            groups.setdefault(doc[DAY_KEY_FIELD], []).append(doc)
+        target = repository.get_container(self.target)
+        for key, docs in groups.items():
+            for chunk in _chunks(docs, _BATCH_LIMIT):
+                if self.dry_run:
+                    continue
+                self.throttle.wait()
+                target.execute_item_batch(
+                    batch_operations=[("upsert", (doc,)) for doc in chunk],
+                    partition_key=key,
+                    response_hook=self.throttle.add_charge,
+                )
+        return sum(len(docs) for docs in groups.values()), skipped
+
+    def copy_range(self, feed_range: dict[str, Any]) -> None:
+        # Ranges are keyed by their opaque value. After a partition split the
+        # new ranges have no checkpoint and start over, which upserts tolerate.
+        key = json.dumps(feed_range, sort_keys=True)
+        with self._lock:
+            progress = self.state["ranges"].setdefault(key, {"token": None, "done": False, "copied": 0, "skipped": 0})
+        if progress["done"]:
+            return
+        self.throttle.wait()
+        pager = repository.get_container(self.source).query_items(
+            query="SELECT * FROM c",
+            feed_range=feed_range,
+            max_item_count=self.page_size,
+            response_hook=self.throttle.add_charge,
+        ).by_page(progress["token"])
+        for page in pager:
+            copied, skipped = self._write_page(list(page))
+            with self._lock:
+                progress["copied"] += copied
+                progress["skipped"] += skipped
+                progress["token"] = pager.continuation_token
+                if not self.dry_run:
+                    self.save()
+            self.throttle.wait()
+        with self._lock:
+            progress.update(token=None, done=True)
+            if not self.dry_run:
+                self.save()
+
+    def totals(self) -> tuple[int, int, int]:
+        ranges = self.state["ranges"].values()
+        return (
+            sum(progress["copied"] for progress in ranges),
+            sum(progress["skipped"] for progress in ranges),
+            sum(1 for progress in ranges if progress["done"]),
+        )
+
+
+def _system_container() -> str:
+    return os.environ.get("COSMOS_SYSTEM_CONTAINER", "system")
+
+
+def migrated(item: dict[str, Any]) -> dict[str, Any] | None:
+    """The item as written to the target, or None when its day cannot be told."""
+    doc = {field: value for field, value in item.items() if field not in _SYSTEM_PROPERTIES}
+    if not doc.get(DAY_KEY_FIELD):
+        if doc.get("fetchedAt"):
+            doc[DAY_KEY_FIELD] = day_key(doc["fetchedAt"])
+        elif item.get("_ts"):
+            doc[DAY_KEY_FIELD] = day_key(datetime.fromtimestamp(item["_ts"], timezone.utc))
+        else:
+            return None
+    return doc
+
+
+def _load_state(source: str, target: str, restart: bool) -> dict[str, Any]:
+    state_id = f"migrate:{source}:{target}"
+    state = None if restart else safe_read_item(_system_container(), state_id, MIGRATION_TYPE)
+    if state and state.get("status") == "success":
+        logging.info("Migration %s already finished; use --restart to copy again", state_id)
+    return state or {
+        "id": state_id,
+        "type": MIGRATION_TYPE,
+        "source": source,
+        "target": target,
+        "status": "running",
+        "startedAt": datetime.now(timezone.utc).isoformat(),
+        "ranges": {},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", help="default: COSMOS_CONTAINER, or the articles container with --articles")
+    parser.add_argument("--target", help="container with partition key /dayKey")
+    parser.add_argument(
+        "--articles", action="store_true", help="copy the shared articles into their day-partitioned listing copy"
+    )
+    parser.add_argument("--concurrency", type=int, default=4, help="feed ranges copied at once")
+    parser.add_argument("--max-ru-per-second", type=float, default=1000.0, help="0 disables throttling")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--restart", action="store_true", help="ignore the saved checkpoint")
+    parser.add_argument("--dry-run", action="store_true", help="read and transform only")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if args.articles:
+        args.source = args.source or os.environ.get("COSMOS_ARTICLES_CONTAINER", "articles")
+        args.target = args.target or article_days_container()
+    args.source = args.source or os.environ.get("COSMOS_CONTAINER", "news_items")
+    if not args.target:
+        parser.error("--target is required unless --articles is given")
+    if args.source == args.target:
+        parser.error("--source and --target must differ")
+
+    state = _load_state(args.source, args.target, args.restart)
+    migration = Migration(
+        args.source,
+        args.target,
+        RuThrottle(args.max_ru_per_second),
+        args.page_size,
+        state,
+        dry_run=args.dry_run,
+    )
+    feed_ranges = list(repository.get_container(args.source).read_feed_ranges())
+    started = time.perf_counter()
+    failed = False
+    with ThreadPoolExecutor(max_workers=max(1, min(args.concurrency, len(feed_ranges)))) as executor:
+        for future in [executor.submit(migration.copy_range, feed_range) for feed_range in feed_ranges]:
+            try:
+                future.result()
+            except Exception:
+                # The other ranges keep going; a rerun resumes this one from its checkpoint.
+                logging.exception("Copying a feed range failed")
+                failed = True
+
+    elapsed = time.perf_counter() - started
+    copied, skipped, done = migration.totals()
+    if not failed and done >= len(feed_ranges):
+        state["status"] = "success"
+    if not args.dry_run:
+        migration.save()
+    print(
+        f"{state['status']}: {done}/{len(feed_ranges)} ranges, copied={copied} skipped={skipped} "
+        f"ru={migration.throttle.spent:.0f} elapsed={elapsed:.1f}s "
+        f"({copied / elapsed if elapsed else 0:.0f} items/s)"
+    )
+    if state["status"] != "success":
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
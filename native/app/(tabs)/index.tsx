@@ -15,7 +15,7 @@ import { LoadingPing } from '../../components/LoadingPing';
 import { loadNewsList, selectNews } from '../../features/newsSlice';
 import { selectLevel } from '../../features/settingsSlice';
 import { useAppDispatch, useAppSelector } from '../../hooks/useRTK';
-import { pickContentByLevel } from '../../lib/newsApi';
+import { pickPreviewByLevel } from '../../lib/newsApi';
 
 export default function HomeScreen() {
   const dispatch = useAppDispatch();
@@ -32,13 +32,19 @@ export default function HomeScreen() {
   const { user } = useUser();
   const userId = user?.id;
   const lastUserId = useRef<string | undefined>(undefined);
+  const lastLevel = useRef<string | undefined>(undefined);
 
   useEffect(() => {
-    if (status === 'idle' || lastUserId.current !== userId) {
-      dispatch(loadNewsList(userId));
+    if (
+      status === 'idle' ||
+      lastUserId.current !== userId ||
+      lastLevel.current !== level
+    ) {
+      dispatch(loadNewsList({ userId, level }));
       lastUserId.current = userId;
+      lastLevel.current = level;
     }
-  }, [dispatch, status, userId]);
+  }, [dispatch, level, status, userId]);
 
   return (
     <ScrollView style={styles.container} contentContainerStyle={styles.content}>
@@ -72,7 +78,7 @@ export default function HomeScreen() {
         <Text style={styles.sectionTitle}>🗞️ Weekly News</Text>
         <Pressable
           style={styles.syncButton}
-          onPress={() => dispatch(loadNewsList(userId))}
+          onPress={() => dispatch(loadNewsList({ userId, level }))}
         >
           <Ionicons name="sync" size={16} color="#FF385C" />
           <Text style={styles.syncText}>Sync</Text>
@@ -97,7 +103,7 @@ export default function HomeScreen() {
               </View>
               <Text style={styles.cardTitle}>{item.title}</Text>
               <Text style={styles.cardSummary}>
-                {truncateText(pickContentByLevel(item, level), 120)}
+                {truncateText(pickPreviewByLevel(item, level), 120)}
               </Text>
               <View style={styles.cardFooter}>
                 <Text style={styles.cardLink}>Open →</Text>
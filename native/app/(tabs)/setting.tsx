@@ -21,7 +21,7 @@ import {
   setNotificationsEnabled,
 } from '../../features/settingsSlice';
 import { useAppDispatch, useAppSelector } from '../../hooks/useRTK';
-import { pickContentByLevel } from '../../lib/newsApi';
+import { pickPreviewByLevel } from '../../lib/newsApi';
 import {
   cancelDailyNewsNotifications,
   ensureNotificationPermissions,
@@ -106,7 +106,7 @@ export default function SettingScreen() {
   }, [fetchUserNewsSources, isSignedIn, userId]);
 
   const saveNewsSources = React.useCallback(
-    async (sources: Record<NewsSource, boolean>) => {
+    async (sources: Record<NewsSource, boolean>, nextLevel: string = level) => {
       if (!userId) return;
       try {
         const token = await getToken();
@@ -127,13 +127,14 @@ export default function SettingScreen() {
             MistralAI: sources['Mistral AI'],
             Microsoft: sources['Microsoft'],
             AWS: sources['AWS'],
+            level: nextLevel,
           }),
         });
       } catch (err) {
         console.error(JSON.stringify(err, null, 2));
       }
     },
-    [getToken, userId]
+    [getToken, level, userId]
   );
 
   return (
@@ -186,7 +187,10 @@ export default function SettingScreen() {
             return (
               <Pressable
                 key={item}
-                onPress={() => dispatch(setLevel(item))}
+                onPress={() => {
+                  dispatch(setLevel(item));
+                  void saveNewsSources(newsSources, item);
+                }}
                 style={[styles.levelChip, isActive && styles.levelChipActive]}
               >
                 <Text
@@ -420,6 +424,6 @@ function getLatestSummary(
 ) {
   if (!news.length) return 'No new stories yet. Check back soon.';
   const latest = news[0];
-  const text = pickContentByLevel(latest as any, level);
+  const text = pickPreviewByLevel(latest as any, level);
   return text.length > 140 ? `${text.slice(0, 140).trim()}…` : text;
 }
@@ -1,9 +1,10 @@
+import { useAuth } from '@clerk/clerk-expo';
 import { useLocalSearchParams } from 'expo-router';
 import { useEffect, useMemo, useState } from 'react';
 import { Pressable, ScrollView, StyleSheet, Text, View } from 'react-native';
 import * as Speech from 'expo-speech';
 import { CosmosNewsItem } from '../../types/type';
-import { fetchNewsDetail, pickContentByLevel } from '../../lib/newsApi';
+import { fetchNewsDetail, fetchNewsText, pickContentByLevel } from '../../lib/newsApi';
 import { useAppSelector } from '../../hooks/useRTK';
 import { selectLevel } from '../../features/settingsSlice';
 import { LoadingPing } from '../../components/LoadingPing';
@@ -14,13 +15,26 @@ export default function NewsDetailScreen() {
   const [item, setItem] = useState<CosmosNewsItem | null>(null);
   const [errorMessage, setErrorMessage] = useState<string | null>(null);
   const level = useAppSelector(selectLevel);
+  const { getToken, isSignedIn } = useAuth();
 
   useEffect(() => {
     if (!id) return;
     let isMounted = true;
 
-    fetchNewsDetail(id)
-      .then((data) => {
+    fetchNewsDetail(id, level)
+      .then(async (data) => {
+        const key = `content_${level.toLowerCase()}` as keyof CosmosNewsItem;
+        // Only the levels subscribers use are generated overnight; ask for the rest on demand.
+        if (data && !data[key] && isSignedIn) {
+          const token = await getToken();
+          if (token) {
+            try {
+              data = { ...data, [key]: await fetchNewsText(data.id, level, token) };
+            } catch {
+              // Fall back to the summary below.
+            }
+          }
+        }
         if (!isMounted) return;
         setItem(data);
         setErrorMessage(null);
@@ -34,7 +48,7 @@ export default function NewsDetailScreen() {
     return () => {
       isMounted = false;
     };
-  }, [id]);
+  }, [getToken, id, isSignedIn, level]);
 
   const article = useMemo(() => item, [item]);
 
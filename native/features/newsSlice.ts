@@ -15,13 +15,13 @@ const initialState: InitialStateType = {
   error: null,
 };
 
-export const loadNewsList = createAsyncThunk<CosmosNewsItem[], string | undefined>(
-  'news/loadNewsList',
-  async (userId) => {
-    const items = await fetchNewsList(userId);
-    return items;
-  }
-);
+export const loadNewsList = createAsyncThunk<
+  CosmosNewsItem[],
+  { userId?: string; level?: string }
+>('news/loadNewsList', async ({ userId, level }) => {
+  const items = await fetchNewsList(userId, level);
+  return items;
+});
 
 export const newsSlice = createSlice({
   name: 'news',
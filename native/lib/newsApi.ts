@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { CosmosNewsItem } from '../types/type';
+import { CosmosNewsItem, GeneratedTextResponse } from '../types/type';
 
 const NEWS_API_URL = process.env.EXPO_PUBLIC_NEWS_API_URL;
 
@@ -11,10 +11,17 @@ function getNewsApiUrl() {
   return NEWS_API_URL;
 }
 
-export async function fetchNewsList(userId?: string): Promise<CosmosNewsItem[]> {
+export async function fetchNewsList(
+  userId?: string,
+  level?: string
+): Promise<CosmosNewsItem[]> {
   const baseUrl = getNewsApiUrl();
-  const url = userId
-    ? `${baseUrl}${baseUrl.includes('?') ? '&' : '?'}userId=${encodeURIComponent(userId)}`
+  const params = [
+    userId ? `userId=${encodeURIComponent(userId)}` : null,
+    level ? `level=${encodeURIComponent(level)}` : null,
+  ].filter(Boolean);
+  const url = params.length
+    ? `${baseUrl}${baseUrl.includes('?') ? '&' : '?'}${params.join('&')}`
     : baseUrl;
   const response = await axios.get(url, {
     headers: { 'Content-Type': 'application/json' },
@@ -31,15 +38,49 @@ export async function fetchNewsList(userId?: string): Promise<CosmosNewsItem[]>
   return [];
 }
 
+function newsItemUrl(articleId: string, suffix: string, params: string[]) {
+  const [path, query] = getNewsApiUrl().split('?');
+  const search = [query, ...params].filter(Boolean).join('&');
+  return `${path.replace(/\/$/, '')}/${encodeURIComponent(articleId)}${suffix}${search ? `?${search}` : ''}`;
+}
+
 export async function fetchNewsDetail(
-  articleId: string
+  articleId: string,
+  level?: string
 ): Promise<CosmosNewsItem | null> {
-  const items = await fetchNewsList();
+  const params = level ? [`level=${encodeURIComponent(level)}`] : [];
+  const response = await axios.get(newsItemUrl(articleId, '', params), {
+    headers: { 'Content-Type': 'application/json' },
+    timeout: 15000,
+    validateStatus: (status) => status === 200 || status === 404,
+  });
+  if (response.status === 404) return null;
+  const raw = response.data as unknown;
+  return (typeof raw === 'string' ? JSON.parse(raw) : raw) as CosmosNewsItem;
+}
 
-  return items.find((item) => item.id === articleId) ?? null;
+export async function fetchNewsText(
+  articleId: string,
+  level: string,
+  token: string
+): Promise<string> {
+  const response = await axios.get(
+    newsItemUrl(articleId, '/text', [`level=${encodeURIComponent(level)}`]),
+    {
+      headers: { 'Content-Type': 'application/json', Authorization: `Bearer ${token}` },
+      // Levels that were not generated overnight are generated on this request.
+      timeout: 60000,
+    }
+  );
+  return (response.data as GeneratedTextResponse).generatedText;
 }
 
 export function pickContentByLevel(item: CosmosNewsItem, level: string) {
   const key = `content_${level.toLowerCase()}` as keyof CosmosNewsItem;
   return item[key] ?? item.content;
 }
+
+// List rows: feed items carry a short preview instead of the full text.
+export function pickPreviewByLevel(item: CosmosNewsItem, level: string) {
+  return item.preview ?? pickContentByLevel(item, level);
+}
@@ -80,6 +80,8 @@ export type CosmosNewsItem = {
   content_b2?: string;
   content_c1?: string;
   content_c2?: string;
+  // Home feed items only: the first 160 characters of the text at the feed's level.
+  preview?: string;
   url: string;
 };
 
@@ -137,9 +139,12 @@ export type JobStateItem = {
   id: string;
   type: 'job_state';
   jobName: string;
+  runId: string;
+  stage: 'fetch' | 'dedup' | 'generate' | 'persist' | 'feeds' | 'done';
+  startedAt: IsoTimestamp;
   lastRunAt: IsoTimestamp;
   lastRunDateJst: string;
-  status: 'success' | 'failed';
+  status: 'running' | 'paused' | 'success' | 'failed';
   saved: number;
   skippedDuplicates: number;
   error: string | null;